@@ -1,14 +1,36 @@
-from fastapi import APIRouter, HTTPException, Response
+from fastapi import APIRouter, HTTPException, Request, Response
 from pydantic import BaseModel
 from datetime import datetime, timedelta
-from bot import Toko
-import pyvolt, os, secrets, hashlib
+import os, secrets, hashlib
 from fastapi import Depends
-from api.v1.dependencies.auth import get_current_user_id
-from api.v1.utils import generate_6_digit_code, create_encrypted_token, code_store
+from api.v1.dependencies.auth import get_current_user_id, get_token, revoke_token
+from api.v1.utils import generate_6_digit_code, create_encrypted_token, code_store, bot_ipc
+from utils.ipc import IPCError
+from utils.rate_limit import TokenBucketLimiter
 
 router = APIRouter()
-bot = Toko()
+
+# Checked before any work is done, so a flood costs neither DMs nor database writes.
+# Limits are per API worker.
+code_user_limiter = TokenBucketLimiter(rate=1 / 60, capacity=3)      # 3 codes, then 1/min per user
+code_ip_limiter = TokenBucketLimiter(rate=1 / 10, capacity=10)       # 10 codes, then 6/min per IP
+# Guessing is capped per issued code (MAX_CODE_ATTEMPTS), so these are keyed on the
+# caller: wrong codes sent by someone else can't rate limit the user's own attempts
+verify_user_limiter = TokenBucketLimiter(rate=1 / 30, capacity=5)    # per (IP, user)
+verify_ip_limiter = TokenBucketLimiter(rate=1, capacity=30)
+
+def check_rate_limits(*checks: tuple[TokenBucketLimiter, str]):
+    for limiter, key in checks:
+        retry_after = limiter.acquire(key)
+        if retry_after:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests. Try again later.",
+                headers={"Retry-After": str(int(retry_after) + 1)},
+            )
+
+def client_ip(http_request: Request) -> str:
+    return http_request.client.host if http_request.client else "unknown"
 
 class CodeRequest(BaseModel):
     user_id: str
@@ -26,43 +48,35 @@ class UserResponse(BaseModel):
     expires_at: datetime
 
 @router.post("/generate-code", response_model=CodeResponse)
-async def generate_code(request: CodeRequest):
+async def generate_code(request: CodeRequest, http_request: Request):
+    check_rate_limits((code_ip_limiter, client_ip(http_request)), (code_user_limiter, request.user_id))
     try:
         code = generate_6_digit_code()
-        user: pyvolt.User = await bot.fetch_user(request.user_id)
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-
-        code_store[request.user_id] = {
-            "code_hash": hashlib.sha256(code.encode()).hexdigest(),
-            "created_at": datetime.utcnow()
-        }
-
-        em = [pyvolt.SendableEmbed(
-            title="🔐 This code is private. Do not share it.",
-            description=f"""**Your login code is:** **`{code}`**
+        # Stored first, so a code that reaches the user can always be verified
+        await code_store.put(request.user_id, hashlib.sha256(code.encode()).hexdigest())
+        try:
+            # The bot looks the user up and DMs the code; 404 if the user doesn't exist
+            await bot_ipc.request("send_login_code", user_id=request.user_id, code=code)
+        except Exception:
+            await code_store.discard(request.user_id)
+            raise
 
-               This code expires in 10 minutes.
-               For security reasons, please do not share this code with anyone.
-
-               *If you did not request this code, please ignore this message.*""",
-               color="#242424"
-        )]
-
-        await user.send(embeds=em)
         return CodeResponse(message="Code sent successfully.")
+    except IPCError as e:
+        raise HTTPException(status_code=e.status, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating code: {str(e)}")
 
 @router.post("/verify-code", response_model=UserResponse)
-async def verify_code(request: VerifyCodeRequest, response: Response):
+async def verify_code(request: VerifyCodeRequest, response: Response, http_request: Request):
+    ip = client_ip(http_request)
+    check_rate_limits((verify_ip_limiter, ip), (verify_user_limiter, (ip, request.user_id)))
     try:
-        stored = code_store.get(request.user_id)
-        if not stored:
-            raise HTTPException(status_code=404, detail="No code found for user.")
-
         input_hash = hashlib.sha256(request.code.encode()).hexdigest()
-        if input_hash != stored["code_hash"]:
+        created_at = await code_store.consume(request.user_id, input_hash)
+        if created_at is None:
+            if not await code_store.record_failure(request.user_id):
+                raise HTTPException(status_code=404, detail="No code found for user.")
             raise HTTPException(status_code=401, detail="Invalid verification code.")
 
         token = create_encrypted_token(request.user_id, request.code)
@@ -79,13 +93,14 @@ async def verify_code(request: VerifyCodeRequest, response: Response):
         )
 
         expires_at = datetime.utcnow() + timedelta(days=7)
-        del code_store[request.user_id]
 
         return UserResponse(
             user_id=request.user_id,
-            created_at=stored["created_at"],
+            created_at=created_at,
             expires_at=expires_at
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error verifying code: {str(e)}")
 
@@ -94,6 +109,9 @@ async def verify_token(user_id: str = Depends(get_current_user_id)):
     return {"user_id": user_id, "authenticated": True}
 
 @router.post("/auth/logout")
-async def logout(response: Response):
+async def logout(http_request: Request, response: Response):
+    token = get_token(http_request)
+    if token:
+        await revoke_token(token)
     response.delete_cookie(key="auth_token", path="/")
     return {"message": "Logged out successfully"}
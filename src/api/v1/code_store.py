@@ -0,0 +1,120 @@
+import hmac
+import os
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+
+from pymongo import ReturnDocument
+from models.LoginCode import LoginCode
+from utils.cache import TTLCache
+
+# Matches what the login DM promises
+CODE_TTL_SECONDS = 600
+# Wrong guesses a code survives; the user then has to request a new one
+MAX_CODE_ATTEMPTS = 5
+
+class CodeStore(ABC):
+    """Pending login codes, one per user, that expire after CODE_TTL_SECONDS."""
+
+    @abstractmethod
+    async def put(self, user_id: str, code_hash: str) -> datetime:
+        """Store a code for `user_id`, replacing any pending one. Returns its creation time."""
+
+    @abstractmethod
+    async def discard(self, user_id: str):
+        """Drop `user_id`'s pending code, e.g. when it couldn't be delivered."""
+
+    @abstractmethod
+    async def consume(self, user_id: str, code_hash: str) -> datetime | None:
+        """Delete and return the creation time of `user_id`'s code if it matches, else None."""
+
+    @abstractmethod
+    async def record_failure(self, user_id: str) -> bool:
+        """Count a wrong guess against `user_id`'s pending code, dropping it after MAX_CODE_ATTEMPTS.
+
+        Returns False if there was no pending code.
+        """
+
+class MemoryCodeStore(CodeStore):
+    """Process-local store. Only correct with a single API worker."""
+
+    def __init__(self, maxsize: int = 100_000):
+        # user id -> [code hash, created at, wrong guesses]
+        self._codes = TTLCache(maxsize=maxsize, ttl=CODE_TTL_SECONDS)
+
+    async def put(self, user_id: str, code_hash: str) -> datetime:
+        created_at = datetime.utcnow()
+        self._codes.set(user_id, [code_hash, created_at, 0])
+        return created_at
+
+    async def discard(self, user_id: str):
+        self._codes.pop(user_id)
+
+    async def consume(self, user_id: str, code_hash: str) -> datetime | None:
+        stored = self._codes.get(user_id)
+        if stored is None or not hmac.compare_digest(stored[0], code_hash):
+            return None
+        self._codes.pop(user_id)
+        return stored[1]
+
+    async def record_failure(self, user_id: str) -> bool:
+        stored = self._codes.get(user_id)
+        if stored is None:
+            return False
+        stored[2] += 1
+        if stored[2] >= MAX_CODE_ATTEMPTS:
+            self._codes.pop(user_id)
+        return True
+
+class MongoCodeStore(CodeStore):
+    """Shared by every API worker. A TTL index on `expires_at` deletes stale codes."""
+
+    def _collection(self):
+        return LoginCode.get_motor_collection()
+
+    async def put(self, user_id: str, code_hash: str) -> datetime:
+        created_at = datetime.utcnow()
+        await self._collection().update_one(
+            {"_id": user_id},
+            {"$set": {
+                "code_hash": code_hash,
+                "created_at": created_at,
+                "expires_at": created_at + timedelta(seconds=CODE_TTL_SECONDS),
+                "attempts": 0,
+            }},
+            upsert=True,
+        )
+        return created_at
+
+    async def discard(self, user_id: str):
+        await self._collection().delete_one({"_id": user_id})
+
+    async def consume(self, user_id: str, code_hash: str) -> datetime | None:
+        # Match and delete in one step so a code can't be used twice
+        doc = await self._collection().find_one_and_delete(
+            {"_id": user_id, "code_hash": code_hash, "expires_at": {"$gt": datetime.utcnow()}},
+            projection={"created_at": 1},
+        )
+        return doc["created_at"] if doc else None
+
+    async def record_failure(self, user_id: str) -> bool:
+        # The TTL monitor runs about once a minute, so check expiry ourselves too
+        doc = await self._collection().find_one_and_update(
+            {"_id": user_id, "expires_at": {"$gt": datetime.utcnow()}},
+            {"$inc": {"attempts": 1}},
+            projection={"attempts": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+        if doc is None:
+            return False
+        if doc["attempts"] >= MAX_CODE_ATTEMPTS:
+            # Filtered on attempts so a code put again in the meantime survives
+            await self._collection().delete_one({"_id": user_id, "attempts": {"$gte": MAX_CODE_ATTEMPTS}})
+        return True
+
+def create_code_store() -> CodeStore:
+    kind = os.getenv("CODE_STORE", "mongo")
+    if kind == "memory":
+        return MemoryCodeStore()
+    if kind == "mongo":
+        return MongoCodeStore()
+    raise ValueError(f"Unknown CODE_STORE {kind!r} (expected 'memory' or 'mongo')")
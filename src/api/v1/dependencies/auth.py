@@ -1,10 +1,25 @@
 from fastapi import Request, HTTPException
-from jose import jwt, JWTError
+from datetime import datetime, timezone
+import hashlib
+import jwt
 import os
 
+from models.RevokedToken import RevokedToken
+from utils.cache import TTLCache
+
 JWT_SECRET = os.getenv("JWT_SECRET")
 
-def get_current_user_id(request: Request) -> str:
+# token digest -> user id of tokens that passed signature, exp and revocation checks.
+# The TTL bounds how long a logout on another worker takes to apply here.
+_verified = TTLCache(
+    maxsize=int(os.getenv("TOKEN_CACHE_SIZE", "50000")),
+    ttl=float(os.getenv("TOKEN_CACHE_TTL", "60")),
+)
+
+def token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def get_token(request: Request) -> str | None:
     token = request.cookies.get("auth_token")
 
     # Fallback to Authorization header
@@ -12,15 +27,48 @@ def get_current_user_id(request: Request) -> str:
         auth_header = request.headers.get("Authorization")
         if auth_header and auth_header.startswith("Bearer "):
             token = auth_header.removeprefix("Bearer ").strip()
+    return token
+
+def decode_token(token: str) -> dict:
+    try:
+        payload = jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
+    except jwt.InvalidTokenError:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    if not payload.get("user_id"):
+        raise HTTPException(status_code=401, detail="Invalid token payload")
+    return payload
 
+async def get_current_user_id(request: Request) -> str:
+    token = get_token(request)
     if not token:
         raise HTTPException(status_code=401, detail="Not authenticated")
 
-    try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
-        user_id = payload.get("user_id")
-        if not user_id:
-            raise HTTPException(status_code=401, detail="Invalid token payload")
+    digest = token_digest(token)
+    user_id = _verified.get(digest)
+    if user_id is not None:
         return user_id
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid token")
+
+    payload = decode_token(token)
+    if await RevokedToken.get_motor_collection().find_one({"_id": digest}, {"_id": 1}):
+        raise HTTPException(status_code=401, detail="Token revoked")
+
+    # Never cache a token past its own expiry
+    remaining = payload["exp"] - datetime.now(timezone.utc).timestamp() if "exp" in payload else _verified.ttl
+    _verified.set(digest, payload["user_id"], ttl=min(_verified.ttl, remaining))
+    return payload["user_id"]
+
+async def revoke_token(token: str):
+    """Reject `token` from now on, on every worker (within TOKEN_CACHE_TTL)."""
+    digest = token_digest(token)
+    _verified.pop(digest)
+    try:
+        payload = decode_token(token)
+    except HTTPException:
+        return  # Already unusable
+
+    expires_at = datetime.fromtimestamp(payload["exp"], timezone.utc) if "exp" in payload else datetime.max
+    await RevokedToken.get_motor_collection().update_one(
+        {"_id": digest},
+        {"$set": {"user_id": payload["user_id"], "expires_at": expires_at}},
+        upsert=True,
+    )
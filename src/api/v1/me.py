@@ -1,43 +1,71 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from datetime import datetime
+from email.utils import format_datetime, parsedate_to_datetime
 from pydantic import BaseModel
+from typing import Optional
 from api.v1.dependencies.auth import get_current_user_id
-from bot import Toko
-import pyvolt
+from api.v1.utils import bot_ipc
+from utils.ipc import IPCError
+from utils.membership import list_user_servers
 
 router = APIRouter()
-bot = Toko()
 
 class UserInfo(BaseModel):
     user_id: str
     username: str
-    avatar_url: str
+    avatar_url: Optional[str] = None
 
-@router.get("/me/info", response_model=UserInfo)
-async def get_user_info(user_id: str = Depends(get_current_user_id)):
-    user = await bot.fetch_user(user_id)
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+def not_modified(request: Request, etag: str, modified_at: datetime) -> bool:
+    """Evaluate If-None-Match, or If-Modified-Since when there is none (RFC 9110 13.2.2)."""
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match is not None:
+        return if_none_match.strip() == "*" or etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
 
-    return UserInfo(
-        user_id=user.id,
-        username=user.name,
-        avatar_url=user.avatar.url if user.avatar else None
-    )
+    if_modified_since = request.headers.get("If-Modified-Since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return since.tzinfo is not None and modified_at <= since
+    return False
+
+@router.get("/me/info", response_model=UserInfo, responses={304: {"description": "Not modified"}})
+async def get_user_info(request: Request, response: Response, user_id: str = Depends(get_current_user_id)):
+    try:
+        # Served from the bot's profile cache; only a miss reaches the Revolt API
+        user = await bot_ipc.request("resolve_user", user_id=user_id)
+    except IPCError as e:
+        raise HTTPException(status_code=e.status, detail=str(e))
+
+    # HTTP dates have whole seconds
+    modified_at = datetime.fromisoformat(user["modified_at"]).replace(microsecond=0)
+    headers = {
+        "ETag": f'"{user["etag"]}"',
+        "Last-Modified": format_datetime(modified_at, usegmt=True),
+        "Cache-Control": "private, no-cache",
+    }
+    if not_modified(request, headers["ETag"], modified_at):
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return UserInfo(user_id=user["user_id"], username=user["username"], avatar_url=user["avatar_url"])
 
 @router.get("/me/servers")
-async def get_user_servers(user_id: str = Depends(get_current_user_id)):
-    user = await bot.fetch_user(user_id)
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
-    servers = []
-    for server in bot.servers:
-        if user in server.members:
-            
-            servers.append({
-                "server_id": server.id,
-                "server_name": server.name,
-                "avatar_url": server.avatar.url if server.avatar else None
-            })
-
-    return {"servers": servers}
+async def get_user_servers(
+    after: Optional[str] = Query(None, description="server_id cursor from the previous page"),
+    limit: int = Query(50, ge=1, le=200),
+    user_id: str = Depends(get_current_user_id),
+):
+    servers, next_cursor = await list_user_servers(user_id, after=after, limit=limit)
+    return {
+        "servers": [
+            {
+                "server_id": s["server_id"],
+                "server_name": s["server_name"],
+                "avatar_url": s.get("server_icon"),
+            }
+            for s in servers
+        ],
+        "next": next_cursor,
+    }
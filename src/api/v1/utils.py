@@ -1,11 +1,16 @@
 from datetime import datetime, timedelta
 import secrets, hashlib, os
 import jwt
+from api.v1.code_store import create_code_store
+from utils.ipc import IPCClient
 
 JWT_SECRET = os.getenv("JWT_SECRET")
 
-# Temporary in-memory store
-code_store = {}
+# Pending login codes; CODE_STORE=memory keeps them per worker, "mongo" shares them
+code_store = create_code_store()
+
+# Shared by every request in this worker; the bot runs in its own process
+bot_ipc = IPCClient()
 
 def generate_6_digit_code() -> str:
     return f"{secrets.randbelow(900000) + 100000:06d}"
@@ -0,0 +1,234 @@
+"""Micro-benchmarks for the Economy gear's command bodies.
+
+Runs each command against mongomock_motor, with the models initialised through
+Beanie as in production, seeded with servers of several sizes. Reports
+throughput, p50/p99 latency and Mongo operations per command. Network and
+server time are not modelled and mongomock is far slower than mongod at large
+documents, so compare runs with each other rather than with production numbers.
+
+Usage (from src/):
+    python -m benchmarks.economy
+    python -m benchmarks.economy --sizes 100 10000 --layout member --json after.json --compare before.json
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from beanie import init_beanie
+from mongomock_motor import AsyncMongoMockClient
+
+import utils.economy as economy_utils
+import modules.economy as economy_module
+from models.Cooldown import Cooldown
+from models.MemberEconomy import MemberEconomy
+from models.ServerEconomy import ServerEconomy
+from utils.command_scope import command_scope
+from utils.cooldowns import CooldownBucket
+from utils.economy_ledger import EconomyLedger
+
+SERVER_ID = "bench-server"
+
+# name -> (Economy attribute, positional args, keyword args)
+SCENARIOS = {
+    "balance": ("balance_command", (), {}),
+    "coinflip": ("coinflip_command", ("10",), {}),
+    "deposit": ("deposit_command", ("10",), {}),
+    "withdraw": ("withdraw_command", ("10",), {}),
+    "daily": ("daily_command", (), {}),
+    "roulette": ("roulette_command", ("red", "10"), {}),
+    "job": ("job_command", (), {"job_name": "Barista"}),
+}
+
+class _Avatar:
+    def url(self) -> str:
+        return "https://autumn.revolt.chat/avatars/bench"
+
+class _Message:
+    async def reply(self, *args, **kwargs):
+        return self
+
+def make_ctx(user_id: str):
+    return SimpleNamespace(
+        author=SimpleNamespace(id=user_id, name=user_id, avatar=_Avatar()),
+        server=SimpleNamespace(id=SERVER_ID, name="Bench"),
+        message=_Message(),
+        bot=None,
+    )
+
+# Collection methods the economy and cooldown code calls; each call is counted
+COUNTED_METHODS = (
+    "find", "find_one", "find_one_and_update", "find_one_and_delete", "update_one",
+    "insert_one", "bulk_write", "aggregate", "count_documents",
+)
+
+def count_calls(collection, ops: Counter):
+    """Count calls on one collection object. Beanie hands out the same object on every access."""
+    for method in COUNTED_METHODS:
+        call = getattr(collection, method)
+
+        def counted(*args, _call=call, _name=f"{collection.name}.{method}", **kwargs):
+            ops[_name] += 1
+            return _call(*args, **kwargs)
+
+        setattr(collection, method, counted)
+
+def keep_id_for_reread(collection):
+    """Work around mongomock's find_one_and_update returning None after a guarded update.
+
+    With ReturnDocument.AFTER, mongomock re-reads the document by _id if the
+    projected match has one, and otherwise by the original filter, which a guard
+    like {"wallet": {"$gte": n}} may no longer match. So ask for _id and drop it
+    again when the caller's projection excluded it.
+    """
+    find_one_and_update = collection.find_one_and_update
+
+    async def patched(filter, update, *args, projection=None, **kwargs):
+        if not projection or projection.get("_id", 1):
+            return await find_one_and_update(filter, update, *args, projection=projection, **kwargs)
+        doc = await find_one_and_update(
+            filter, update, *args, projection={**projection, "_id": 1}, **kwargs
+        )
+        if doc is not None:
+            doc.pop("_id", None)
+        return doc
+
+    collection.find_one_and_update = patched
+
+async def install_mock_mongo(layout: str, members: int, rng: random.Random) -> Counter:
+    """Initialise the economy and cooldown models on a fresh, seeded mongomock database."""
+    models = [ServerEconomy, MemberEconomy, Cooldown]
+    await init_beanie(database=AsyncMongoMockClient()["toko_bench"], document_models=models)
+
+    users = {
+        f"member-{i}": {"wallet": rng.randint(1_000, 5_000), "bank": 300, "last_daily": None, "job": None}
+        for i in range(members)
+    }
+    if layout == "member":
+        await MemberEconomy.get_motor_collection().insert_many(
+            [{"server_id": SERVER_ID, "user_id": user_id, **user} for user_id, user in users.items()]
+        )
+    else:
+        await ServerEconomy.get_motor_collection().insert_one({"_id": SERVER_ID, "enabled": True, "users": users})
+
+    ops = Counter()
+    for model in models:
+        keep_id_for_reread(model.get_motor_collection())
+        count_calls(model.get_motor_collection(), ops)
+
+    economy_utils.ECONOMY_LAYOUT = layout
+    # Cooldowns would otherwise stop repeated calls by the same member
+    economy_module.coinflip_cooldowns = CooldownBucket("coinflip", 0)
+    economy_module.job_cooldowns = CooldownBucket("job", 0, persist=True)
+    return ops
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+async def run_scenario(gear, name: str, members: int, iterations: int, ops: Counter, rng: random.Random) -> dict:
+    attr, args, kwargs = SCENARIOS[name]
+    callback = getattr(type(gear), attr).callback
+
+    async def invoke():
+        ctx = make_ctx(f"member-{rng.randrange(members)}")
+        with command_scope():
+            await callback(gear, ctx, *args, **kwargs)
+
+    for _ in range(min(50, iterations)):
+        await invoke()
+
+    ops.clear()
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await invoke()
+        latencies.append((time.perf_counter() - start) * 1000)
+    elapsed = time.perf_counter() - started
+
+    return {
+        "command": name,
+        "members": members,
+        "iterations": iterations,
+        "ops_per_sec": round(iterations / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 4),
+        "p99_ms": round(percentile(latencies, 99), 4),
+        "mongo_ops_per_call": round(sum(ops.values()) / iterations, 3),
+        "mongo_ops": {op: round(count / iterations, 3) for op, count in sorted(ops.items())},
+    }
+
+async def run(sizes: list[int], commands: list[str], iterations: int, layout: str, write_behind: bool, seed: int) -> list[dict]:
+    results = []
+    for members in sizes:
+        rng = random.Random(seed)
+        ops = await install_mock_mongo(layout, members, rng)
+        economy_utils.ledger = EconomyLedger(economy_utils._write_deltas) if write_behind else None
+        gear = economy_module.Economy(SimpleNamespace())
+
+        for name in commands:
+            result = await run_scenario(gear, name, members, iterations, ops, rng)
+            results.append(result)
+            print(
+                f"{name:<10} {members:>7} members  {result['ops_per_sec']:>10.1f} ops/s  "
+                f"p50 {result['p50_ms']:.3f}ms  p99 {result['p99_ms']:.3f}ms  "
+                f"{result['mongo_ops_per_call']:.2f} mongo ops"
+            )
+
+        if economy_utils.ledger is not None:
+            await economy_utils.ledger.close()
+    return results
+
+def compare(results: list[dict], baseline_path: str):
+    with open(baseline_path) as f:
+        baseline = {(r["command"], r["members"]): r for r in json.load(f)["results"]}
+
+    print(f"\nCompared with {baseline_path}:")
+    for result in results:
+        old = baseline.get((result["command"], result["members"]))
+        if not old:
+            continue
+        speedup = result["ops_per_sec"] / old["ops_per_sec"] if old["ops_per_sec"] else float("inf")
+        print(
+            f"{result['command']:<10} {result['members']:>7} members  x{speedup:.2f} ops/s  "
+            f"p99 {old['p99_ms']:.3f} -> {result['p99_ms']:.3f}ms  "
+            f"mongo ops {old['mongo_ops_per_call']:.2f} -> {result['mongo_ops_per_call']:.2f}"
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1_000, 10_000])
+    parser.add_argument("--commands", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--iterations", type=int, default=2_000)
+    parser.add_argument("--layout", choices=["server", "member"], default=economy_utils.ECONOMY_LAYOUT)
+    parser.add_argument("--write-behind", action="store_true", help="buffer wallet deltas in the economy ledger")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--json", metavar="PATH", help="write results as JSON")
+    parser.add_argument("--compare", metavar="PATH", help="JSON results of an earlier run to compare against")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.sizes, args.commands, args.iterations, args.layout, args.write_behind, args.seed))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "meta": {
+                    "timestamp": datetime.now(timezone.utc).isoformat(),
+                    "python": platform.python_version(),
+                    "layout": args.layout,
+                    "write_behind": args.write_behind,
+                    "iterations": args.iterations,
+                    "seed": args.seed,
+                },
+                "results": results,
+            }, f, indent=2)
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == "__main__":
+    main()
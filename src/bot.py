@@ -1,25 +1,47 @@
+import time
+_import_started = time.perf_counter()
+
+import asyncio
 import os
 import sys
 import logging
+from typing import Awaitable, Callable
 import pyvolt
-import sentry_sdk  # Sentry integration
 
 from dotenv import load_dotenv
-from pyvolt.ext import commands
-from utils.mongodb import TokoDatabase
 
+# Before the imports below, which read their settings from the environment
 load_dotenv()
 
-# === Sentry Setup ===
-sentry_sdk.init(
-    dsn=os.getenv("SENTRY_DSN"),
-    traces_sample_rate=1.0,
-    environment=os.getenv("ENVIRONMENT", "production"),
-)
+from pyvolt.ext import commands
+from utils.mongodb import TokoDatabase
+from utils.cache import TTLCache
+from models.Prefix import Prefix
+from utils.command_scope import command_scope
+from utils.economy import flush_ledger
+from utils.sharding import ShardStats, event_server_id, shard_for
+from utils.ipc import IPCServer
+from utils.pagination import PaginationManager
+from utils.message_cache import MessageCache
+from utils.startup import startup
+from utils import metrics
+
+startup.record("imports", time.perf_counter() - _import_started)
 
-# === Prepare log directory ===
 LOG_DIR = os.path.join(os.path.dirname(__file__), "logs")
-os.makedirs(LOG_DIR, exist_ok=True)
+
+# Everything below that touches the outside world (Sentry, log files, the
+# client itself) runs from main()/launcher.py, so importing this module, as
+# every gear does, stays cheap and side-effect free.
+
+def init_sentry():
+    import sentry_sdk  # Sentry integration
+
+    sentry_sdk.init(
+        dsn=os.getenv("SENTRY_DSN"),
+        traces_sample_rate=1.0,
+        environment=os.getenv("ENVIRONMENT", "production"),
+    )
 
 # === Styled Logging Setup ===
 
@@ -63,11 +85,15 @@ pyvolt_logger = logging.getLogger("Pyvolt")
 pyvolt_logger.setLevel(logging.INFO)
 pyvolt_logger.propagate = False
 
-if not logger.handlers:
+def setup_logging(log_name: str = "latest.log"):
+    if logger.handlers:
+        return
+
+    os.makedirs(LOG_DIR, exist_ok=True)
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(ColorFormatter(fmt=log_format, datefmt=date_format))
 
-    log_file_path = os.path.join(LOG_DIR, "latest.log")
+    log_file_path = os.path.join(LOG_DIR, log_name)
     file_handler = logging.FileHandler(log_file_path, encoding="utf-8", mode="w")
     file_handler.setFormatter(logging.Formatter(fmt=log_format, datefmt=date_format))
 
@@ -78,14 +104,46 @@ if not logger.handlers:
 
 # === Bot Class ===
 
+async def _close_server(server: asyncio.AbstractServer) -> None:
+    server.close()
+    await server.wait_closed()
+
+DEFAULT_PREFIX = ".t"
+# Commands issuing more Mongo queries than this are logged as likely N+1 patterns
+QUERY_WARN_THRESHOLD = int(os.getenv("MONGO_QUERY_WARN", "8"))
+
 class Toko(commands.Bot):
-    def __init__(self):
+    def __init__(self, shard_id: int = 0, shard_count: int = 1, stats_queue=None):
         super().__init__(
             command_prefix=self.get_prefix,
             token=os.getenv("TOKEN"),
         )
         self.db = TokoDatabase()
         self.logger = logger
+        # With shard_count > 1 (see launcher.py) this process only handles servers
+        # whose id hashes to shard_id; everything else is dropped in dispatch()
+        self.shard_id = shard_id
+        self.shard_count = shard_count
+        self.shard_stats = ShardStats(shard_id)
+        self.stats_queue = stats_queue
+        # Awaited in order by close(), e.g. to flush buffered writes
+        self.shutdown_hooks: list[Callable[[], Awaitable[None]]] = [flush_ledger]
+        # server id -> prefix; servers without a custom prefix are cached as the default
+        self.prefixes = TTLCache(
+            maxsize=int(os.getenv("PREFIX_CACHE_SIZE", "100000")),
+            ttl=float(os.getenv("PREFIX_CACHE_TTL", "3600")),
+        )
+        # Requests from the web API; handlers are registered by gears (modules/dashboard.py)
+        self.ipc = IPCServer()
+        # Reaction paging for any gear; reactions are routed by modules/pagination.py
+        self.paginator = PaginationManager()
+        self.shutdown_hooks.append(self.paginator.close)
+        # Contents of recent messages in servers that log deletes/edits (filled by modules/logging.py)
+        self.message_cache = MessageCache(
+            max_bytes=int(os.getenv("MESSAGE_CACHE_BYTES", str(64 * 1024 * 1024))),
+            server_max_bytes=int(os.getenv("MESSAGE_CACHE_SERVER_BYTES", str(4 * 1024 * 1024))),
+            max_age=float(os.getenv("MESSAGE_CACHE_MAX_AGE", str(6 * 3600))),
+        )
 
     async def load_cogs(self) -> None:
         modules_dir = os.path.join(os.path.dirname(__file__), "modules")
@@ -93,7 +151,8 @@ class Toko(commands.Bot):
             if file.endswith(".py"):
                 ext = file[:-3]
                 try:
-                    await self.load_extension(f"modules.{ext}")
+                    with startup.phase(f"gear:{ext}"):
+                        await self.load_extension(f"modules.{ext}")
                     logger.info(f"Loaded extension '{ext}'")
                 except commands.errors.ExtensionAlreadyLoaded:
                     pass
@@ -101,42 +160,134 @@ class Toko(commands.Bot):
                     logger.error(f"Failed to load extension '{ext}': {e}")
 
     async def get_prefix(self, message: pyvolt.Message):
-        default_prefix = ".t"
-
         if message.server is None:
-            return [default_prefix]
+            return [DEFAULT_PREFIX]
 
         server_id = message.server.id
-        server_name = message.server.name
+        prefix = self.prefixes.get(server_id)
+        if prefix is None:
+            # Only reached after eviction or expiry; everything else was preloaded
+            doc = await Prefix.get_motor_collection().find_one({"_id": server_id}, {"prefix": 1})
+            prefix = (doc or {}).get("prefix") or DEFAULT_PREFIX
+            self.prefixes.set(server_id, prefix)
+        return [prefix]
 
-        from models.Prefix import Prefix  
+    async def load_prefixes(self) -> None:
+        """Fill the prefix cache with every stored prefix in one query."""
+        count = 0
+        async for doc in Prefix.get_motor_collection().find({}, {"prefix": 1}):
+            self.prefixes.set(doc["_id"], doc.get("prefix") or DEFAULT_PREFIX)
+            count += 1
+        logger.info(f"Preloaded {count} server prefixes")
 
-        collection = await Prefix.find_one({"_id": server_id})
+    async def set_prefix(self, server: pyvolt.Server, prefix: str) -> None:
+        await Prefix.get_motor_collection().update_one(
+            {"_id": server.id},
+            {"$set": {"prefix": prefix, "servername": server.name}},
+            upsert=True,
+        )
+        # Replace the cached entry so the change applies to the very next message
+        self.prefixes.set(server.id, prefix)
+
+    def owns_server(self, server_id: str) -> bool:
+        return self.shard_count == 1 or shard_for(server_id, self.shard_count) == self.shard_id
 
-        if collection:
-            return [collection.prefix if hasattr(collection, "prefix") else default_prefix]
+    def dispatch(self, event) -> None:
+        # The event has already been received and parsed; see launcher.py for what sharding does and doesn't save
+        if self.shard_count > 1:
+            server_id = event_server_id(event)
+            # Events without a server (READY, user updates) reach every shard,
+            # except DMs, which only shard 0 answers
+            if server_id:
+                owned = self.owns_server(server_id)
+            else:
+                owned = self.shard_id == 0 or not isinstance(event, pyvolt.MessageCreateEvent)
+            if not owned:
+                self.shard_stats.skipped += 1
+                return
+        self.shard_stats.events += 1
+        metrics.gateway_events.inc(type(event).__name__)
+        super().dispatch(event)
 
-        await Prefix.insert_one(Prefix(
-            id=server_id,
-            servername=server_name,
-            prefix=default_prefix
-        ))
-        return [default_prefix]
+    async def invoke(self, ctx: commands.Context) -> None:
+        self.shard_stats.commands += 1
+        name = ctx.command.qualified_name if ctx.command else "unknown"
+        metrics.command_total.inc(name)
+        metrics.command_in_flight.inc(name)
+        start = time.perf_counter()
+        # Reads cached in the scope (e.g. economy balances) are shared by the whole command
+        with command_scope() as scope:
+            try:
+                await super().invoke(ctx)
+            except Exception:
+                metrics.command_errors.inc(name)
+                raise
+            else:
+                # Command errors are handled inside invoke() and only flagged on the context
+                if getattr(ctx, "command_failed", False):
+                    metrics.command_errors.inc(name)
+            finally:
+                metrics.command_duration.observe(name, value=time.perf_counter() - start)
+                metrics.command_in_flight.dec(name)
+                metrics.command_queries.observe(name, value=scope.queries)
+                if scope.queries > QUERY_WARN_THRESHOLD:
+                    logger.warning(f"Command '{name}' issued {scope.queries} database queries (possible N+1)")
 
     async def setup_hook(self) -> None:
         await self.db.connect()
-        await self.load_cogs()
+        self.shutdown_hooks.append(self.db.close)
+        with startup.phase("load_prefixes"):
+            await self.load_prefixes()
+        with startup.phase("gears"):
+            await self.load_cogs()
+        if self.shard_id == 0:
+            await self.ipc.start()
+            self.shutdown_hooks.append(self.ipc.close)
+        metrics_port = os.getenv("METRICS_PORT")
+        if metrics_port:
+            # One port per shard: METRICS_PORT, METRICS_PORT + 1, ...
+            server = await metrics.serve_metrics(int(metrics_port) + self.shard_id)
+            self.shutdown_hooks.append(lambda: _close_server(server))
+        metrics.registry.register_stats("toko_prefix_cache", self.prefixes.stats)
+        metrics.registry.register_stats("toko_message_cache", self.message_cache.stats)
+        if self.stats_queue is not None:
+            interval = float(os.getenv("SHARD_STATS_INTERVAL", "30"))
+            asyncio.get_running_loop().create_task(self.shard_stats.report_to(self.stats_queue, interval))
+
+    def add_shutdown_hook(self, hook: Callable[[], Awaitable[None]]):
+        if hook not in self.shutdown_hooks:
+            self.shutdown_hooks.append(hook)
+
+    def remove_shutdown_hook(self, hook: Callable[[], Awaitable[None]]):
+        """Drop a gear's hook when it unloads, so reloads don't pile them up."""
+        if hook in self.shutdown_hooks:
+            self.shutdown_hooks.remove(hook)
+
+    async def close(self) -> None:
+        for hook in self.shutdown_hooks:
+            try:
+                await hook()
+            except Exception as e:
+                logger.error(f"Shutdown hook {getattr(hook, '__name__', hook)} failed: {e}")
+        await super().close()
 
     async def on_ready(self, event) -> None: 
-        logger.info(f"Logged in as {self.user.name} ({self.user.id})")
+        shard = f" [shard {self.shard_id}/{self.shard_count}]" if self.shard_count > 1 else ""
+        logger.info(f"Logged in as {self.user.name} ({self.user.id}){shard}")
+        startup.finish()
 
 # === Run Bot ===
 
-bot = Toko()
-
-if __name__ == "__main__":
+def main():
+    startup.start()
+    init_sentry()
+    setup_logging()
     try:
         logger.info("Starting TokoBot...")
+        bot = Toko()
         bot.run(os.environ.get("TOKEN"))
     except Exception as e:
-        logger.exception(f"Failed to run bot: {e}")
\ No newline at end of file
+        logger.exception(f"Failed to run bot: {e}")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,150 @@
+"""Run Toko as several worker processes, each owning a slice of servers.
+
+Every worker connects to the gateway and handles only the servers whose id
+hashes to its shard (see utils/sharding.py), so commands and log events for
+one server are always processed by the same process. Workers that exit are
+restarted with backoff, and per-shard event throughput is logged.
+
+Revolt has no gateway sharding, so every worker still opens a full session and
+receives and parses every event before dispatch() drops the ones it doesn't
+own. Only handler work (commands, logging, database writes) is split across
+cores; gateway bandwidth and event parsing grow with the number of shards, so
+only add shards while handlers, not ingestion, are the bottleneck.
+
+Usage (from src/):
+    python -m launcher --shards 4
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import time
+
+logger = logging.getLogger("toko.launcher")
+
+# A worker that stays up this long has its restart backoff reset
+STABLE_AFTER_SECONDS = 60
+MAX_BACKOFF_SECONDS = 300
+
+def run_shard(shard_id: int, shard_count: int, stats_queue):
+    # Imported here so each worker builds its own client, loop and caches
+    from bot import Toko, init_sentry, setup_logging
+    from utils.startup import startup
+
+    startup.start()
+    init_sentry()
+    setup_logging(f"shard-{shard_id}.log")
+
+    # terminate() sends SIGTERM; handle it like Ctrl+C so close() flushes buffered writes
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    bot = Toko(shard_id=shard_id, shard_count=shard_count, stats_queue=stats_queue)
+    bot.logger.info(f"Starting TokoBot shard {shard_id}/{shard_count}...")
+    bot.run(os.environ.get("TOKEN"))
+
+class Worker:
+    __slots__ = ("shard_id", "process", "started_at", "backoff", "restart_at")
+
+    def __init__(self, shard_id: int):
+        self.shard_id = shard_id
+        self.process = None
+        self.started_at = 0.0
+        self.backoff = 1.0
+        self.restart_at = 0.0
+
+class Launcher:
+    def __init__(self, shard_count: int, stats_interval: float):
+        self.shard_count = shard_count
+        self.stats_interval = stats_interval
+        self.ctx = multiprocessing.get_context("spawn")
+        self.stats_queue = self.ctx.Queue()
+        self.workers = [Worker(i) for i in range(shard_count)]
+        self.latest: dict[int, dict] = {}
+        self.stopping = False
+
+    def start(self, worker: Worker):
+        worker.process = self.ctx.Process(
+            target=run_shard,
+            args=(worker.shard_id, self.shard_count, self.stats_queue),
+            name=f"toko-shard-{worker.shard_id}",
+            daemon=False,
+        )
+        worker.process.start()
+        worker.started_at = time.monotonic()
+        logger.info(f"Shard {worker.shard_id} started (pid {worker.process.pid})")
+
+    def supervise(self):
+        now = time.monotonic()
+        for worker in self.workers:
+            process = worker.process
+            if process is not None and process.is_alive():
+                if now - worker.started_at > STABLE_AFTER_SECONDS:
+                    worker.backoff = 1.0
+                continue
+
+            if process is not None:
+                logger.warning(
+                    f"Shard {worker.shard_id} exited with code {process.exitcode}, "
+                    f"restarting in {worker.backoff:.0f}s"
+                )
+                worker.process = None
+                worker.restart_at = now + worker.backoff
+                worker.backoff = min(worker.backoff * 2, MAX_BACKOFF_SECONDS)
+            elif now >= worker.restart_at:
+                self.start(worker)
+
+    def collect_stats(self, timeout: float):
+        try:
+            report = self.stats_queue.get(timeout=timeout)
+        except queue.Empty:
+            return
+        self.latest[report["shard"]] = report
+        # Log once per round, when every live shard has reported
+        alive = sum(1 for w in self.workers if w.process is not None and w.process.is_alive())
+        if len(self.latest) < alive:
+            return
+
+        total = 0.0
+        parts = []
+        for shard_id in sorted(self.latest):
+            r = self.latest[shard_id]
+            rate = r["events"] / r["seconds"] if r["seconds"] else 0.0
+            total += rate
+            parts.append(f"#{shard_id} {rate:.1f}/s ({r['commands']} cmds, {r['skipped']} skipped)")
+        logger.info(f"Shard throughput {total:.1f} events/s: " + ", ".join(parts))
+        self.latest.clear()
+
+    def stop(self, *_):
+        self.stopping = True
+
+    def run(self):
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+        for worker in self.workers:
+            self.start(worker)
+
+        while not self.stopping:
+            self.supervise()
+            self.collect_stats(timeout=1.0)
+
+        logger.info("Stopping shards...")
+        for worker in self.workers:
+            if worker.process is not None and worker.process.is_alive():
+                worker.process.terminate()
+        for worker in self.workers:
+            if worker.process is not None:
+                worker.process.join(timeout=15)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shards", type=int, default=int(os.getenv("TOKO_SHARDS", os.cpu_count() or 1)))
+    parser.add_argument("--stats-interval", type=float, default=30.0, help="seconds between shard throughput reports")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="[%(asctime)s] [%(levelname)s] %(name)s: %(message)s")
+    os.environ["SHARD_STATS_INTERVAL"] = str(args.stats_interval)
+    Launcher(max(1, args.shards), args.stats_interval).run()
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,14 @@
 import uvicorn
+from dotenv import load_dotenv
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+# The API modules read JWT_SECRET etc. at import
+load_dotenv()
+
 from api.v1.auth import router as auth_router
 from api.v1.me import router as me_router
+from utils.mongodb import TokoDatabase
 
 app = FastAPI(
     title="Toko API",
@@ -20,6 +25,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+db = TokoDatabase()
+
+@app.on_event("startup")
+async def connect_database():
+    # Beanie models (e.g. the membership index) need an initialised connection
+    await db.connect()
+
+@app.on_event("shutdown")
+async def close_database():
+    # Stops the health check loop started by connect()
+    await db.close()
+
 # ✅ API Routes
 app.include_router(auth_router, prefix="/api/v1", tags=["Auth"])
 app.include_router(me_router, prefix="/api/v1", tags=["User Info"])
@@ -0,0 +1,17 @@
+from beanie import Document
+from pydantic import Field
+from pymongo import ASCENDING, IndexModel
+from datetime import datetime
+
+class Cooldown(Document):
+    id: str = Field(alias="_id")  # "<bucket>:<key>"
+    bucket: str
+    key: str
+    expires_at: datetime
+
+    class Settings:
+        name = "cooldowns"
+        indexes = [
+            IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0, name="expire_at"),
+            IndexModel([("bucket", ASCENDING)], name="bucket"),
+        ]
@@ -0,0 +1,18 @@
+from beanie import Document
+from pydantic import Field
+from pymongo import ASCENDING, IndexModel
+from datetime import datetime
+
+class LoginCode(Document):
+    id: str = Field(alias="_id")  # user id; one pending code per user
+    code_hash: str
+    created_at: datetime
+    expires_at: datetime
+    # Wrong guesses so far; see api/v1/code_store.py
+    attempts: int = 0
+
+    class Settings:
+        name = "login_codes"
+        indexes = [
+            IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0, name="expire_at"),
+        ]
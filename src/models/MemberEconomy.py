@@ -0,0 +1,18 @@
+from beanie import Document
+from pymongo import ASCENDING, IndexModel
+from datetime import datetime
+from typing import Optional
+
+class MemberEconomy(Document):
+    server_id: str
+    user_id: str
+    wallet: int = 0
+    bank: int = 0
+    last_daily: Optional[datetime] = None
+    job: Optional[str] = None
+
+    class Settings:
+        name = "member_economy"
+        indexes = [
+            IndexModel([("server_id", ASCENDING), ("user_id", ASCENDING)], unique=True, name="server_user"),
+        ]
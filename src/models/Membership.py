@@ -0,0 +1,19 @@
+from beanie import Document
+from pymongo import ASCENDING, IndexModel
+from datetime import datetime
+from typing import Optional
+
+class Membership(Document):
+    user_id: str
+    server_id: str
+    # Denormalized so /me/servers needs no second lookup
+    server_name: str
+    server_icon: Optional[str] = None
+    synced_at: Optional[datetime] = None
+
+    class Settings:
+        name = "memberships"
+        indexes = [
+            IndexModel([("user_id", ASCENDING), ("server_id", ASCENDING)], unique=True, name="user_server"),
+            IndexModel([("server_id", ASCENDING), ("synced_at", ASCENDING)], name="server_synced"),
+        ]
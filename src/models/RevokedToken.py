@@ -0,0 +1,15 @@
+from beanie import Document
+from pydantic import Field
+from pymongo import ASCENDING, IndexModel
+from datetime import datetime
+
+class RevokedToken(Document):
+    id: str = Field(alias="_id")  # sha256 of the token
+    user_id: str
+    expires_at: datetime  # the token's own exp; after that it's rejected anyway
+
+    class Settings:
+        name = "revoked_tokens"
+        indexes = [
+            IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0, name="expire_at"),
+        ]
@@ -1,11 +1,12 @@
 from beanie import Document
 from pydantic import BaseModel, Field
+from datetime import datetime
 from typing import Dict, Optional
 
 class UserEconomy(BaseModel):
     wallet: int = 0
     bank: int = 0
-    last_daily: Optional[str] = None
+    last_daily: Optional[datetime] = None
     job: Optional[str] = None
 
 class ServerEconomy(Document):
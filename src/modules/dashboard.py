@@ -0,0 +1,79 @@
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+
+import pyvolt
+from pyvolt.ext import commands
+from bot import Toko
+from utils.cache import TTLCache
+from utils.ipc import IPCError
+
+class Dashboard(commands.Gear):
+    """Operations the web API asks the bot to perform over IPC (see utils/ipc.py)."""
+
+    def __init__(self, bot: Toko):
+        self.bot = bot
+        # user id -> profile served to the dashboard; dropped on user update events
+        self.profiles = TTLCache(
+            maxsize=int(os.getenv("PROFILE_CACHE_SIZE", "10000")),
+            ttl=float(os.getenv("PROFILE_CACHE_TTL", "900")),
+        )
+        # user id -> (etag, modified_at); outlives the profiles so a refetch that finds
+        # nothing changed keeps Last-Modified in step with the etag
+        self.versions = TTLCache(maxsize=int(os.getenv("PROFILE_CACHE_SIZE", "10000")) * 10, ttl=7 * 24 * 3600)
+        bot.ipc.register("send_login_code", self.send_login_code)
+        bot.ipc.register("resolve_user", self.resolve_user)
+
+    async def fetch_user(self, user_id: str) -> pyvolt.User:
+        try:
+            user = await self.bot.fetch_user(user_id)
+        except Exception as e:
+            if getattr(e, "status", None) == 404:
+                user = None
+            else:
+                raise
+        if not user:
+            raise IPCError("User not found", status=404)
+        return user
+
+    async def send_login_code(self, user_id: str, code: str) -> None:
+        user = await self.fetch_user(user_id)
+        em = [pyvolt.SendableEmbed(
+            title="🔐 This code is private. Do not share it.",
+            description=f"""**Your login code is:** **`{code}`**
+
+               This code expires in 10 minutes.
+               For security reasons, please do not share this code with anyone.
+
+               *If you did not request this code, please ignore this message.*""",
+               color="#242424"
+        )]
+        await user.send(embeds=em)
+
+    async def resolve_user(self, user_id: str) -> dict:
+        """Return a user's profile plus an `etag` and `modified_at` for conditional requests."""
+        profile = self.profiles.get(user_id)
+        if profile is None:
+            user = await self.fetch_user(user_id)
+            data = {
+                "user_id": user.id,
+                "username": user.name,
+                "avatar_url": user.avatar.url() if user.avatar else None,
+            }
+            # Content hash, so it is stable across refetches while nothing changes
+            etag = hashlib.sha1(json.dumps(data, sort_keys=True).encode()).hexdigest()
+            version = self.versions.get(user_id)
+            if version is None or version[0] != etag:
+                version = (etag, datetime.now(timezone.utc).isoformat())
+            self.versions.set(user_id, version)
+            profile = {**data, "etag": etag, "modified_at": version[1]}
+            self.profiles.set(user_id, profile)
+        return profile
+
+    @commands.Gear.listener()
+    async def on_user_update(self, e: pyvolt.UserUpdateEvent):
+        self.profiles.pop(e.user.id)
+
+async def setup(bot: Toko) -> None:
+    await bot.add_gear(Dashboard(bot))
@@ -1,6 +1,9 @@
 from pyvolt.ext import commands
 from utils.economy import *
 from tools.db_funcs import *
+from utils.cooldowns import cooldown_bucket, load_persistent_cooldowns
+from utils.metrics import registry
+from utils.jobs import JobCatalog
 from bot import Toko
 from pathlib import Path
 from datetime import datetime, timedelta
@@ -8,13 +11,16 @@ from datetime import datetime, timedelta
 
 import pyvolt
 import random
-import json
-import time
 import textwrap
 
 COIN_EMOJI = ":01JXTVCNYB53TC48R7JJ14SMMB:"
 COOLDOWN_SECONDS = 10
-user_cooldowns: dict[str, float] = {}
+JOB_COOLDOWN_HOURS = 24
+LEADERBOARD_PAGE_SIZE = 10
+
+coinflip_cooldowns = cooldown_bucket("coinflip", COOLDOWN_SECONDS)
+# Keyed by "server_id:user_id" and persisted so restarts don't reset them
+job_cooldowns = cooldown_bucket("job", JOB_COOLDOWN_HOURS * 3600, persist=True)
 
 ROULETTE_COLORS = {
     0: "green",
@@ -29,9 +35,6 @@ ROULETTE_COLORS = {
 JOBS_PATH = Path(__file__).parent / ".." / "data" / "jobs.json"
 JOBS_PATH = JOBS_PATH.resolve()
 
-with open(JOBS_PATH, "r") as f:
-    JOBS = json.load(f)
-
 FAILURE_MESSAGES = [
     "You lied on your résumé and got caught.",
     "You showed up late to the interview and spilled coffee on your boss.",
@@ -58,6 +61,9 @@ RARITY_WEIGHTS = {
     "risky": 2
 }
 
+# Reloads itself when jobs.json changes on disk
+JOBS = JobCatalog(JOBS_PATH, RARITY_WEIGHTS, COIN_EMOJI)
+
 class Economy(commands.Gear):
     def __init__(self, bot: Toko):
         self.bot = bot
@@ -74,7 +80,6 @@ class Economy(commands.Gear):
     async def balance_command(self, ctx: commands.Context):
         user_id = ctx.author.id
         server_id = ctx.server.id
-        await ensure_user(server_id, user_id)
         balance = await get_balance(server_id, user_id)
         total = balance["wallet"] + balance["bank"]
 
@@ -95,35 +100,33 @@ class Economy(commands.Gear):
     async def coinflip_command(self, ctx: commands.Context, amount: str = "100"):
         user_id = ctx.author.id
         server_id = ctx.server.id
-        now = time.time()
-        last_used = user_cooldowns.get(user_id, 0)
-        if now - last_used < COOLDOWN_SECONDS:
-            wait = round(COOLDOWN_SECONDS - (now - last_used))
-            return await ctx.message.reply(f"🕒 Try again in `{wait}s`.", silent=True)
+        remaining = coinflip_cooldowns.remaining(user_id)
+        if remaining:
+            return await ctx.message.reply(f"🕒 Try again in `{round(remaining)}s`.", silent=True)
 
-        await ensure_user(server_id, user_id)
-        balance = await get_balance(server_id, user_id)
         if amount.lower() == "all":
-            amount = balance["wallet"]
+            amount = (await get_balance(server_id, user_id))["wallet"]
         elif amount.isdigit():
             amount = int(amount)
         else:
             return await ctx.message.reply("❌ Invalid amount. Use a number or `all`.", silent=True)
 
-        if amount <= 0 or balance["wallet"] < amount:
+        if amount <= 0:
             return await ctx.message.reply("❌ Invalid or insufficient amount.", silent=True)
 
         win = random.choices([True, False], weights=[35, 65])[0]
+        # One guarded update: fails without touching the wallet if it can't cover the stake
+        if await settle_bet(server_id, user_id, amount, amount if win else -amount) is None:
+            return await ctx.message.reply("❌ Invalid or insufficient amount.", silent=True)
+
         if win:
-            await add_wallet(server_id, user_id, amount)
             result = f"🎉 **You won** {COIN_EMOJI} `{amount}`!"
             color = "#A162FF"
         else:
-            await add_wallet(server_id, user_id, -amount)
             result = f"💀 **You lost** {COIN_EMOJI} `{amount}`."
             color = "#FF6B6B"
 
-        user_cooldowns[user_id] = now
+        await coinflip_cooldowns.trigger(user_id)
         embed = pyvolt.SendableEmbed(
             title="🎲 Coin Flip",
             description=result,
@@ -137,20 +140,16 @@ class Economy(commands.Gear):
     async def deposit_command(self, ctx: commands.Context, amount: str = "0"):
         user_id = ctx.author.id
         server_id = ctx.server.id
-        await ensure_user(server_id, user_id)
-        balance = await get_balance(server_id, user_id)
-
         if amount.lower() == "all":
-            amount = balance["wallet"]
+            amount = (await get_balance(server_id, user_id))["wallet"]
         elif amount.isdigit():
             amount = int(amount)
         else:
             return await ctx.message.reply("❌ Invalid amount.", silent=True)
 
-        if amount <= 0 or balance["wallet"] < amount:
+        if amount <= 0 or await deposit(server_id, user_id, amount) is None:
             return await ctx.message.reply("❌ Invalid or insufficient amount.", silent=True)
 
-        await deposit(server_id, user_id, amount)
         await ctx.message.reply(
             embeds=[pyvolt.SendableEmbed(
                 title="🏦 Deposit",
@@ -165,20 +164,16 @@ class Economy(commands.Gear):
     async def withdraw_command(self, ctx: commands.Context, amount: str = "0"):
         user_id = ctx.author.id
         server_id = ctx.server.id
-        await ensure_user(server_id, user_id)
-        balance = await get_balance(server_id, user_id)
-
         if amount.lower() == "all":
-            amount = balance["bank"]
+            amount = (await get_balance(server_id, user_id))["bank"]
         elif amount.isdigit():
             amount = int(amount)
         else:
             return await ctx.message.reply("❌ Invalid amount.", silent=True)
 
-        if amount <= 0 or balance["bank"] < amount:
+        if amount <= 0 or await withdraw(server_id, user_id, amount) is None:
             return await ctx.message.reply("❌ Invalid or insufficient amount.", silent=True)
 
-        await withdraw(server_id, user_id, amount)
         await ctx.message.reply(
             embeds=[pyvolt.SendableEmbed(
                 title="💸 Withdraw",
@@ -193,12 +188,10 @@ class Economy(commands.Gear):
     async def daily_command(self, ctx: commands.Context):
         user_id = ctx.author.id
         server_id = ctx.server.id
-        await ensure_user(server_id, user_id)
 
-        if not await can_claim_daily(server_id, user_id):
+        if await claim_daily(server_id, user_id, amount=500) is None:
             return await ctx.message.reply("🕒 Already claimed today. Come back in 24h!", silent=True)
 
-        await claim_daily(server_id, user_id, amount=500)
         await ctx.message.reply(
             embeds=[pyvolt.SendableEmbed(
                 title="🎁 Daily Reward",
@@ -208,23 +201,64 @@ class Economy(commands.Gear):
             )], silent=True
         )
 
+    @commands.server_only()
+    @commands.command(name="leaderboard", aliases=["lb", "top"])
+    async def leaderboard_command(self, ctx: commands.Context, page: str = "1"):
+        """Show the richest members of this server."""
+        if not page.isdigit() or int(page) < 1:
+            return await ctx.message.reply("❌ Invalid page number.", silent=True)
+
+        ranks = await leaderboard.get(ctx.server.id)
+        total_pages = max(1, -(-len(ranks) // LEADERBOARD_PAGE_SIZE))
+        own_rank = ranks.rank(ctx.author.id)
+        footer = f"\n\nYour rank: **#{own_rank}** of {len(ranks)}" if own_rank else ""
+
+        def render(page_idx: int) -> pyvolt.SendableEmbed:
+            # Rendered on each page turn, so later pages reflect the live ranking
+            offset = page_idx * LEADERBOARD_PAGE_SIZE
+            lines = [
+                f"**#{offset + i}** <@{user_id}> — {COIN_EMOJI} `{wealth}`"
+                for i, (user_id, wealth) in enumerate(ranks.top(offset, LEADERBOARD_PAGE_SIZE), start=1)
+            ]
+            return pyvolt.SendableEmbed(
+                title=f"🏆 Leaderboard (Page {page_idx + 1}/{total_pages})",
+                description=("\n".join(lines) or "Nobody has any coins yet.") + footer,
+                color="#FFD43B"
+            )
+
+        await self.bot.paginator.send(ctx, render, total_pages, page=min(int(page), total_pages) - 1)
+
+    @commands.server_only()
+    @commands.command(name="rank")
+    async def rank_command(self, ctx: commands.Context):
+        """Show your position on the server leaderboard."""
+        user_id = ctx.author.id
+        server_id = ctx.server.id
+        ranks = await leaderboard.get(server_id)
+        # Creates the member if needed, which also records them in the ranking
+        await get_balance(server_id, user_id)
+
+        await ctx.message.reply(embeds=[pyvolt.SendableEmbed(
+            title=f"{ctx.author.name}",
+            description=f"🏆 Rank **#{ranks.rank(user_id)}** of {len(ranks)} with {COIN_EMOJI} `{ranks.score(user_id)}`",
+            color="#FFD43B",
+            icon_url=self.get_avatar_url(ctx.author)
+        )], silent=True)
+
     @commands.server_only()
     @commands.command(name="roulette")
     async def roulette_command(self, ctx: commands.Context, bet: str, amount: str = "100"):
         JOB_COOLDOWN_HOURS = 24
         user_id = ctx.author.id
         server_id = ctx.server.id
-        await ensure_user(server_id, user_id)
-        balance = await get_balance(server_id, user_id)
-
         if amount.lower() == "all":
-            amount = balance["wallet"]
+            amount = (await get_balance(server_id, user_id))["wallet"]
         elif amount.isdigit():
             amount = int(amount)
         else:
             return await ctx.message.reply("❌ Invalid amount.", silent=True)
 
-        if amount <= 0 or balance["wallet"] < amount:
+        if amount <= 0:
             return await ctx.message.reply("❌ Invalid or insufficient amount.", silent=True)
 
         result = random.randint(0, 36)
@@ -248,12 +282,13 @@ class Economy(commands.Gear):
         else:
             return await ctx.message.reply("❌ Bet must be: red, black, even, odd or 0–36", silent=True)
 
+        if await settle_bet(server_id, user_id, amount, payout if win else -amount) is None:
+            return await ctx.message.reply("❌ Invalid or insufficient amount.", silent=True)
+
         if win:
-            await add_wallet(server_id, user_id, payout)
             msg = f"🎉 You **won** {COIN_EMOJI} `{payout}`!"
             color_hex = "#2ECC71"
         else:
-            await add_wallet(server_id, user_id, -amount)
             msg = f"💀 You **lost** {COIN_EMOJI} `{amount}`"
             color_hex = "#E74C3C"
 
@@ -268,103 +303,51 @@ class Economy(commands.Gear):
     @commands.command(name="jobs")
     async def jobs_list_command(self, ctx: commands.Context):
         """Show all available jobs (paginated)."""
-        jobs_per_page = 5
-        pages = [
-            JOBS[i:i + jobs_per_page]
-            for i in range(0, len(JOBS), jobs_per_page)
-        ]
-        total_pages = len(pages)
-        page = 0
-
-        def make_embed(page_idx):
-            job_lines = [
-                f"**{job['name']}** — Income: {COIN_EMOJI} `{job['min_income']} - {job['max_income']}` | Rarity: `{job['rarity']}`"
-                for job in pages[page_idx]
-            ]
-            return pyvolt.SendableEmbed(
-                title=f"📋 Available Jobs (Page {page_idx + 1}/{total_pages})",
-                description="\n".join(job_lines),
-                color="#98C9FF"
-            )
-
-        embed = make_embed(page)
-        msg = await ctx.message.reply(embeds=[embed], silent=True)
-
-        if total_pages == 1:
-            return
-
-        await msg.react("◀️")
-        await msg.react("▶️")
-
-        def check(reaction, user):
-            return (
-                reaction.message.id == msg.id
-                and user.id == ctx.author.id
-                and str(reaction.emoji) in ["◀️", "▶️"]
-            )
-
-        while True:
-            try:
-                reaction, user = await ctx.bot.wait_for("reaction_add", timeout=30.0, check=check)
-            except Exception:
-                break
-
-            if str(reaction.emoji) == "▶️" and page < total_pages - 1:
-                page += 1
-                await msg.edit(embeds=[make_embed(page)])
-            elif str(reaction.emoji) == "◀️" and page > 0:
-                page -= 1
-                await msg.edit(embeds=[make_embed(page)])
-
-            try:
-                await msg.remove_reaction(reaction.emoji, user)
-            except Exception:
-                pass
+        pages = JOBS.pages
+        await self.bot.paginator.send(ctx, pages.__getitem__, len(pages))
 
     @commands.server_only()
     @commands.command(name="job")
     async def job_command(self, ctx: commands.Context, *, job_name: str = None):
         """Apply for a specific job (use .jobs to view list)."""
-        JOB_COOLDOWN_HOURS = 24
         user_id = ctx.author.id
         server_id = ctx.server.id
+        cooldown_key = f"{server_id}:{user_id}"
 
-        now = time.time()
-        if server_id not in user_cooldowns:
-            user_cooldowns[server_id] = {}
-        last_used = user_cooldowns[server_id].get(user_id, 0)
-
-        if now - last_used < JOB_COOLDOWN_HOURS * 3600:
-            hours_left = round((JOB_COOLDOWN_HOURS * 3600 - (now - last_used)) / 3600, 1)
+        remaining = job_cooldowns.remaining(cooldown_key)
+        if remaining:
+            hours_left = round(remaining / 3600, 1)
             return await ctx.message.reply(
                 f"🕒 You already applied for a job recently. Try again in `{hours_left}h`.", silent=True
             )
 
-        await ensure_user(server_id, user_id)
-
         if job_name is None:
             await self.jobs_list_command(ctx)
             return
 
-        job_name = job_name.lower()
-        selected_job = next((job for job in JOBS if job["name"].lower() == job_name), None)
+        matches = JOBS.matches(job_name)
 
-        if not selected_job:
+        if not matches:
             return await ctx.message.reply("❌ That job doesn't exist. Try `.jobs` to see options.", silent=True)
+        if len(matches) > 1:
+            # Checked before the cooldown is spent
+            names = ", ".join(f"`{job.name}`" for job in matches[:10])
+            more = f" and {len(matches) - 10} more" if len(matches) > 10 else ""
+            return await ctx.message.reply(f"🤔 Which job did you mean? {names}{more}", silent=True)
+        selected_job = matches[0]
 
-        success_chance = RARITY_WEIGHTS.get(selected_job["rarity"], 1) / 10
-        success = random.random() < success_chance
+        success = random.random() < selected_job.success_chance
 
         if success:
-            pay = random.randint(selected_job["min_income"], selected_job["max_income"])
+            pay = random.randint(selected_job.min_income, selected_job.max_income)
             await add_wallet(server_id, user_id, pay)
-            msg = random.choice(SUCCESS_MESSAGES) + f" You got the job as **{selected_job['name']}** and earned {COIN_EMOJI} `{pay}`!"
+            msg = random.choice(SUCCESS_MESSAGES) + f" You got the job as **{selected_job.name}** and earned {COIN_EMOJI} `{pay}`!"
             color = "#4CAF50"
         else:
             msg = random.choice(FAILURE_MESSAGES)
             color = "#F44336"
 
-        user_cooldowns[server_id][user_id] = now
+        await job_cooldowns.trigger(cooldown_key)
 
         embed = pyvolt.SendableEmbed(
             title="💼 Job Application",
@@ -376,4 +359,9 @@ class Economy(commands.Gear):
         await ctx.message.reply(embeds=[embed], silent=True)
 
 async def setup(bot: Toko) -> None:
+    await load_persistent_cooldowns()
+    # Keyed by prefix, so a reload replaces rather than duplicates these
+    registry.register_stats("toko_leaderboard", leaderboard.stats)
+    if ledger is not None:
+        registry.register_stats("toko_economy_ledger", ledger.stats)
     await bot.add_gear(Economy(bot))
@@ -2,66 +2,112 @@ import pyvolt
 from pyvolt.ext import commands
 from tools.db_funcs import *
 from bot import Toko
-from tools.permission_flags import PERMISSION_FLAGS  # move flags to separate file
+from tools.permission_flags import describe_flag_change
+from utils.log_config import *
+from utils.log_delivery import LogDelivery
+from utils.log_burst import BurstCoalescer
+from utils.message_cache import CachedMessage
+from utils.metrics import instrumented_listener, registry
 
 class Logging(commands.Gear):
     def __init__(self, bot: Toko):
         self.bot = bot
-        self.log_cache = {}
+        self.delivery = LogDelivery(bot)
+        # Mass deletes (raids, restructures) become summaries instead of one embed each
+        self.bursts = BurstCoalescer(self.delivery.enqueue)
+        # Held summaries have to be queued before delivery drains
+        bot.add_shutdown_hook(self.bursts.close)
+        bot.add_shutdown_hook(self.delivery.close)
+        registry.register_stats("toko_log_delivery", self.delivery.stats)
+        registry.register_stats("toko_log_bursts", self.bursts.stats)
+
+    async def gear_unload(self):
+        # The next instance registers its own hooks; send what this one still holds
+        self.bot.remove_shutdown_hook(self.bursts.close)
+        self.bot.remove_shutdown_hook(self.delivery.close)
+        await self.bursts.close()
+        await self.delivery.close()
+        # Nothing keeps the cache current until logging is loaded again
+        self.bot.message_cache.clear()
 
     def get_avatar_url(self, user: pyvolt.User) -> str:
         if user.avatar:
             return user.avatar.url()
         return self.bot.http.url_for(pyvolt.routes.USERS_GET_DEFAULT_AVATAR.compile(user_id=user.id))
 
-    async def get_cached_log_channel(self, server_id: str, category: str, event_type: str):
-        if server_id not in self.log_cache:
-            self.log_cache[server_id] = {}
-        if category not in self.log_cache[server_id]:
-            self.log_cache[server_id][category] = {}
-        if event_type not in self.log_cache[server_id][category]:
-            await ensure_logging_config(server_id, None)
-            if await should_log(server_id, category, event_type):
-                config = await get_log_channel(server_id, category, event_type)
-                self.log_cache[server_id][category][event_type] = config
-            else:
-                self.log_cache[server_id][category][event_type] = None
-        return self.log_cache[server_id][category][event_type]
-
-    async def send_log_embed(self, channel_id: str, embed: pyvolt.SendableEmbed):
-        try:
-            channel = await self.bot.fetch_channel(channel_id)
-            if channel:
-                await channel.send(embeds=[embed])
-        except Exception:
-            pass
-
-    def decode_permissions(self, bitmask: int) -> str:
-        return ", ".join(name for bit, name in PERMISSION_FLAGS.items() if bitmask & bit) or "None"
+    def send_log_embed(self, channel_id: str, embed: pyvolt.SendableEmbed):
+        """Queue an embed for batched delivery to a log channel."""
+        self.delivery.enqueue(channel_id, embed)
 
     @commands.Gear.listener()
-    async def on_message_delete(self, m: pyvolt.MessageDeleteEvent):
-        message = m.message
-        author = message.author
+    @instrumented_listener
+    async def on_message(self, message: pyvolt.Message):
         server = message.server
-        if not server or author.bot:
+        if not server or message.author.bot:
+            return
+
+        # Only servers that log deletes/edits pay for caching their messages
+        settings = cached_log_settings(server.id) or await read_log_settings(server.id)
+        if not settings.mask & (MESSAGE_DELETE | MESSAGE_EDIT):
             return
 
-        log_config = await self.get_cached_log_channel(server.id, "message_logs", "message_delete")
-        if not log_config or not log_config.get("channel_id"):
+        self.bot.message_cache.put(CachedMessage(
+            id=message.id,
+            server_id=server.id,
+            channel_id=message.channel.id,
+            author_id=message.author.id,
+            content=message.content or "",
+            attachments=tuple((a.filename, a.url()) for a in message.attachments or ()),
+        ))
+
+    @commands.Gear.listener()
+    @instrumented_listener
+    async def on_server_delete(self, e: pyvolt.ServerDeleteEvent):
+        self.bot.message_cache.forget_server(e.server_id)
+
+    @commands.Gear.listener()
+    @instrumented_listener
+    async def on_message_delete(self, m: pyvolt.MessageDeleteEvent):
+        message = m.message
+        # Falls back to our own cache when pyvolt no longer has the message
+        cached = self.bot.message_cache.pop(m.message_id)
+
+        if message is not None:
+            author = message.author
+            server = message.server
+            if not server or author.bot:
+                return
+            server_id = server.id
+            author_mention, author_id = author.mention, author.id
+            channel_mention = message.channel.mention
+            content = message.content or "[No content]"
+            attachments = [(a.filename, a.url()) for a in message.attachments or ()]
+            avatar_url = self.get_avatar_url(author)
+            timestamp = getattr(message, "created_at", None)
+        elif cached is not None:
+            server_id = cached.server_id
+            server = self.bot.get_server(server_id)
+            author_mention, author_id = f"<@{cached.author_id}>", cached.author_id
+            channel_mention = f"<#{cached.channel_id}>"
+            content = cached.content or "[No content]"
+            attachments = list(cached.attachments)
+            avatar_url = None
+            timestamp = None
+        else:
             return
 
-        avatar_url = self.get_avatar_url(author)
-        timestamp = getattr(message, "created_at", None)
-        content = message.content or "[No content]"
+        settings = cached_log_settings(server_id) or await load_log_settings(server_id, server.name if server else "")
+        channel_id = settings.channel_for(MESSAGE_DELETE)
+        if not channel_id:
+            return
 
         attachment_links = ""
-        if message.attachments:
-            attachment_links = "\n".join(f"[{a.filename}]({a.url()})" for a in message.attachments)
+        if attachments:
+            attachment_links = "\n".join(f"[{filename}]({url})" for filename, url in attachments)
 
         embed_description = (
-            f"**Channel:** {message.channel.mention}\n"
-            f"**Author:** {author.mention} (`{author.id}`)\n"
+            f"**Channel:** {channel_mention}\n"
+            f"**Author:** {author_mention} (`{author_id}`)\n"
         )
 
         if timestamp:
@@ -71,7 +117,7 @@ class Logging(commands.Gear):
 
         embed_description += (
             f"**Content:**\n```text\n{content}\n```\n"
-            f"`Message ID:` `{message.id}`"
+            f"`Message ID:` `{m.message_id}`"
         )
 
         if attachment_links:
@@ -84,47 +130,76 @@ class Logging(commands.Gear):
             icon_url=avatar_url
         )
 
-        await self.send_log_embed(log_config["channel_id"], embed)
+        self.bursts.add(
+            server_id, MESSAGE_DELETE, channel_id, embed,
+            entry=f"`{m.message_id}` by {author_mention} in {channel_mention}",
+            summary_title="🗑️ Messages Deleted",
+        )
 
 
     @commands.Gear.listener()
+    @instrumented_listener
     async def on_message_edit(self, m: pyvolt.MessageUpdateEvent):
         before, after = m.before, m.after
         message = m.message
-        author = before.author
-        server = message.server
-        if not server or author.bot:
+        if message is None:
+            return
+        # Author and server are missing from partial messages pyvolt doesn't cache
+        cached = self.bot.message_cache.get(message.id)
+        author = getattr(message, "author", None) or getattr(after, "author", None)
+        server = getattr(message, "server", None) or (self.bot.get_server(cached.server_id) if cached else None)
+        if not server or (author is not None and author.bot):
+            return
+        if author is not None:
+            author_mention, author_id, avatar_url = author.mention, author.id, self.get_avatar_url(author)
+        elif cached is not None:
+            author_mention, author_id, avatar_url = f"<@{cached.author_id}>", cached.author_id, None
+        else:
             return
+        new_content = (after.content if after is not None else getattr(message, "content", None)) or ""
+
+        # `before` is only there while pyvolt still caches the message
+        if before is not None:
+            original = before.content or "[No content]"
+        elif cached is not None:
+            original = cached.content or "[No content]"
+        else:
+            original = "[Unknown]"
+        if cached is not None:
+            self.bot.message_cache.update_content(message.id, new_content)
 
-        log_config = await self.get_cached_log_channel(server.id, "message_logs", "message_edit")
-        if not log_config or not log_config.get("channel_id"):
+        settings = cached_log_settings(server.id) or await load_log_settings(server.id, server.name)
+        channel_id = settings.channel_for(MESSAGE_EDIT)
+        if not channel_id:
             return
 
         embed = pyvolt.SendableEmbed(
             title="✏️ Message Edited",
             description=(
-                f"**Channel:** {message.channel.mention}\n"
-                f"**Author:** {author.mention} (`{author.id}`)\n"
-                f"[Jump to Message](https://app.revolt.chat/server/{server.id}/channel/{message.channel.id}/{message.id})\n\n"
-                f"**Original Content:**\n```text\n{before.content or '[No content]'}\n```\n"
-                f"**New Content:**\n```text\n{after.content or '[No content]'}\n```\n"
+                f"**Channel:** <#{message.channel_id}>\n"
+                f"**Author:** {author_mention} (`{author_id}`)\n"
+                f"[Jump to Message](https://app.revolt.chat/server/{server.id}/channel/{message.channel_id}/{message.id})\n\n"
+                f"**Original Content:**\n```text\n{original}\n```\n"
+                f"**New Content:**\n```text\n{new_content or '[No content]'}\n```\n"
                 f"`Message ID:` `{message.id}`"
             ),
             color="#f1c40f",
-            icon_url=self.get_avatar_url(author)
+            icon_url=avatar_url
         )
-        await self.send_log_embed(log_config["channel_id"], embed)
+        self.send_log_embed(channel_id, embed)
 
     @commands.Gear.listener()
+    @instrumented_listener
     async def on_server_role_create_or_update(self, e: pyvolt.RawServerRoleUpdateEvent):
         server = e.server
         if not server:
             return
 
         is_creation = e.old_role is None and e.new_role is not None
-        event_type = "role_create" if is_creation else "role_update"
-        log_config = await self.get_cached_log_channel(server.id, "role_logs", event_type)
-        if not log_config or not log_config.get("channel_id"):
+        event = ROLE_CREATE if is_creation else ROLE_UPDATE
+        settings = cached_log_settings(server.id) or await load_log_settings(server.id, server.name)
+        channel_id = settings.channel_for(event)
+        if not channel_id:
             return
 
         icon_url = server.icon.url() if server.icon else None
@@ -146,15 +221,13 @@ class Logging(commands.Gear):
                 after = getattr(new, attr, None)
 
                 if attr == "permissions":
-                    allow_before = self.decode_permissions(before.allow.value if before and before.allow else 0)
-                    allow_after = self.decode_permissions(after.allow.value if after and after.allow else 0)
-                    deny_before = self.decode_permissions(before.deny.value if before and before.deny else 0)
-                    deny_after = self.decode_permissions(after.deny.value if after and after.deny else 0)
-
-                    if allow_before != allow_after:
-                        changes.append(f"**Permissions (Allow):** `{allow_before}` → `{allow_after}`")
-                    if deny_before != deny_after:
-                        changes.append(f"**Permissions (Deny):** `{deny_before}` → `{deny_after}`")
+                    # Only the flags that were added or removed, not both full lists
+                    for side, label in (("allow", "Permissions (Allow)"), ("deny", "Permissions (Deny)")):
+                        mask_before = getattr(before, side).value if before and getattr(before, side) else 0
+                        mask_after = getattr(after, side).value if after and getattr(after, side) else 0
+                        change = describe_flag_change(label, mask_before, mask_after)
+                        if change:
+                            changes.append(change)
                     return
 
                 if before != after:
@@ -179,9 +252,10 @@ class Logging(commands.Gear):
                 icon_url=icon_url
             )
 
-        await self.send_log_embed(log_config["channel_id"], embed)
+        self.send_log_embed(channel_id, embed)
     
     @commands.Gear.listener()
+    @instrumented_listener
     async def on_server_role_delete(self, e: pyvolt.ServerRoleDeleteEvent):
         server = e.server
         role = e.role
@@ -189,8 +263,9 @@ class Logging(commands.Gear):
         if not server or not role:
             return
 
-        log_config = await self.get_cached_log_channel(server.id, "role_logs", "role_delete")
-        if not log_config or not log_config.get("channel_id"):
+        settings = cached_log_settings(server.id) or await load_log_settings(server.id, server.name)
+        channel_id = settings.channel_for(ROLE_DELETE)
+        if not channel_id:
             return
 
         icon_url = server.icon.url() if server.icon else None
@@ -202,17 +277,23 @@ class Logging(commands.Gear):
             icon_url=icon_url
         )
 
-        await self.send_log_embed(log_config["channel_id"], embed)
+        self.bursts.add(
+            server.id, ROLE_DELETE, channel_id, embed,
+            entry=f"{role.name} (`{role.id}`)",
+            summary_title="❌ Roles Deleted",
+        )
     
     @commands.Gear.listener()
+    @instrumented_listener
     async def on_server_channel_create(self, e: pyvolt.ChannelCreateEvent):
         server = e.server
         channel = e.channel
         if not server or not channel:
             return
 
-        log_config = await self.get_cached_log_channel(server.id, "channel_logs", "channel_create")
-        if not log_config or not log_config.get("channel_id"):
+        settings = cached_log_settings(server.id) or await load_log_settings(server.id, server.name)
+        channel_id = settings.channel_for(CHANNEL_CREATE)
+        if not channel_id:
             return
 
         icon_url = server.icon.url() if server.icon else None
@@ -226,9 +307,10 @@ class Logging(commands.Gear):
             color="#2ecc71",
             icon_url=icon_url
         )
-        await self.send_log_embed(log_config["channel_id"], embed)
+        self.send_log_embed(channel_id, embed)
 
     @commands.Gear.listener()
+    @instrumented_listener
     async def on_server_channel_update(self, e: pyvolt.ChannelUpdateEvent):
         server = e.server
         old = e.old_channel
@@ -236,8 +318,9 @@ class Logging(commands.Gear):
         if not server or not old or not new:
             return
 
-        log_config = await self.get_cached_log_channel(server.id, "channel_logs", "channel_update")
-        if not log_config or not log_config.get("channel_id"):
+        settings = cached_log_settings(server.id) or await load_log_settings(server.id, server.name)
+        channel_id = settings.channel_for(CHANNEL_UPDATE)
+        if not channel_id:
             return
 
         icon_url = server.icon.url() if server.icon else None
@@ -267,17 +350,19 @@ class Logging(commands.Gear):
             color="#f1c40f",
             icon_url=icon_url
         )
-        await self.send_log_embed(log_config["channel_id"], embed)
+        self.send_log_embed(channel_id, embed)
 
     @commands.Gear.listener()
+    @instrumented_listener
     async def on_server_channel_delete(self, e: pyvolt.ChannelDeleteEvent):
         server = e.server
         channel = e.channel
         if not server or not channel:
             return
 
-        log_config = await self.get_cached_log_channel(server.id, "channel_logs", "channel_delete")
-        if not log_config or not log_config.get("channel_id"):
+        settings = cached_log_settings(server.id) or await load_log_settings(server.id, server.name)
+        channel_id = settings.channel_for(CHANNEL_DELETE)
+        if not channel_id:
             return
 
         icon_url = server.icon.url() if server.icon else None
@@ -288,7 +373,11 @@ class Logging(commands.Gear):
             color="#e74c3c",
             icon_url=icon_url
         )
-        await self.send_log_embed(log_config["channel_id"], embed)
+        self.bursts.add(
+            server.id, CHANNEL_DELETE, channel_id, embed,
+            entry=f"{channel.name} (`{channel.id}`)",
+            summary_title="❌ Channels Deleted",
+        )
 
 async def setup(bot: Toko) -> None:
     await bot.add_gear(Logging(bot))
\ No newline at end of file
@@ -0,0 +1,62 @@
+import asyncio
+
+import pyvolt
+from pyvolt.ext import commands
+from bot import Toko
+from utils.membership import add_member, remove_member, remove_server, sync_server, sync_stamp, update_server
+
+class Membership(commands.Gear):
+    """Keeps the user -> servers index used by the dashboard's /me/servers up to date."""
+
+    def __init__(self, bot: Toko):
+        self.bot = bot
+        self._sync_task: asyncio.Task | None = None
+
+    async def sync_members(self, server):
+        try:
+            stamp = sync_stamp()
+            members = await server.fetch_members()
+            await sync_server(server, (member.id for member in members), stamp)
+        except Exception as e:
+            self.bot.logger.warning(f"Failed to sync memberships of {server.id}: {e}")
+
+    async def sync_all(self):
+        # Catches up on joins/leaves missed while the bot was offline
+        for server in list(self.bot.servers.values()):
+            if self.bot.owns_server(server.id):
+                await self.sync_members(server)
+        self.bot.logger.info("Synced server memberships")
+
+    @commands.Gear.listener()
+    async def on_ready(self, e: pyvolt.ReadyEvent):
+        # Once per process: refetching every server's members on each reconnect is too costly,
+        # so joins/leaves missed during a gateway outage are caught up on the next restart
+        if self._sync_task is None:
+            self._sync_task = asyncio.create_task(self.sync_all())
+
+    @commands.Gear.listener()
+    async def on_server_member_join(self, e: pyvolt.ServerMemberJoinEvent):
+        server = e.member.server
+        if server:
+            await add_member(server, e.member.id)
+
+    @commands.Gear.listener()
+    async def on_server_member_remove(self, e: pyvolt.ServerMemberRemoveEvent):
+        await remove_member(e.server_id, e.user_id)
+
+    @commands.Gear.listener()
+    async def on_server_create(self, e: pyvolt.ServerCreateEvent):
+        await self.sync_members(e.server)
+
+    @commands.Gear.listener()
+    async def on_server_update(self, e: pyvolt.ServerUpdateEvent):
+        server = e.after
+        if server:
+            await update_server(server)
+
+    @commands.Gear.listener()
+    async def on_server_delete(self, e: pyvolt.ServerDeleteEvent):
+        await remove_server(e.server_id)
+
+async def setup(bot: Toko) -> None:
+    await bot.add_gear(Membership(bot))
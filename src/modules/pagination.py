@@ -0,0 +1,17 @@
+import pyvolt
+from pyvolt.ext import commands
+from bot import Toko
+
+class Pagination(commands.Gear):
+    """Routes reactions to the bot-wide PaginationManager."""
+
+    def __init__(self, bot: Toko):
+        self.bot = bot
+
+    @commands.Gear.listener()
+    async def on_message_react(self, e: pyvolt.MessageReactEvent):
+        if e.message_id in self.bot.paginator.sessions:
+            await self.bot.paginator.handle_reaction(e.message_id, e.user_id, e.emoji)
+
+async def setup(bot: Toko) -> None:
+    await bot.add_gear(Pagination(bot))
@@ -0,0 +1,36 @@
+from pyvolt.ext import commands
+from bot import Toko, DEFAULT_PREFIX
+
+import pyvolt
+
+MAX_PREFIX_LENGTH = 10
+
+class Settings(commands.Gear):
+    def __init__(self, bot: Toko):
+        self.bot = bot
+
+    @commands.server_only()
+    @commands.command(name="prefix")
+    async def prefix_command(self, ctx: commands.Context, new_prefix: str = None):
+        """Show or change the command prefix for this server."""
+        if new_prefix is None:
+            current = (await self.bot.get_prefix(ctx.message))[0]
+            return await ctx.message.reply(f"Current prefix is `{current}`.", silent=True)
+
+        if not ctx.server.permissions_for(ctx.author).manage_server:
+            return await ctx.message.reply("❌ You need the `Manage Server` permission to do that.", silent=True)
+
+        if len(new_prefix) > MAX_PREFIX_LENGTH or any(c.isspace() for c in new_prefix):
+            return await ctx.message.reply(
+                f"❌ Prefixes can't contain spaces or be longer than {MAX_PREFIX_LENGTH} characters.", silent=True
+            )
+
+        await self.bot.set_prefix(ctx.server, new_prefix)
+        await ctx.message.reply(embeds=[pyvolt.SendableEmbed(
+            title="⚙️ Prefix Updated",
+            description=f"Commands now use `{new_prefix}` (default is `{DEFAULT_PREFIX}`).",
+            color="#98C9FF"
+        )], silent=True)
+
+async def setup(bot: Toko) -> None:
+    await bot.add_gear(Settings(bot))
@@ -0,0 +1,55 @@
+from utils import cache
+from utils.cache import TTLCache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+def test_get_set_and_stats():
+    c = TTLCache(maxsize=10, ttl=60)
+    c.set("a", 1)
+    assert c.get("a") == 1
+    assert c.get("missing", "default") == "default"
+    assert c.stats() == {"size": 1, "hits": 1, "misses": 1}
+
+def test_entries_expire(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache.time, "monotonic", clock)
+    c = TTLCache(maxsize=10, ttl=60)
+    c.set("a", 1)
+    c.set("b", 2, ttl=120)
+
+    clock.now += 61
+    assert c.get("a") is None
+    assert "a" not in c
+    assert c.get("b") == 2
+    assert len(c) == 1
+
+def test_least_recently_used_is_evicted():
+    c = TTLCache(maxsize=2, ttl=60)
+    c.set("a", 1)
+    c.set("b", 2)
+    c.get("a")
+    c.set("c", 3)
+    assert "a" in c
+    assert "b" not in c
+    assert "c" in c
+
+def test_falsy_values_are_cached():
+    c = TTLCache()
+    c.set("zero", 0)
+    c.set("none", None)
+    assert "zero" in c
+    assert "none" in c
+
+def test_pop_and_clear():
+    c = TTLCache()
+    c.set("a", 1)
+    assert c.pop("a") == 1
+    assert c.pop("a", "gone") == "gone"
+    c.set("b", 2)
+    c.clear()
+    assert len(c) == 0
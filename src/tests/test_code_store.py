@@ -0,0 +1,60 @@
+import asyncio
+
+from beanie import init_beanie
+from mongomock_motor import AsyncMongoMockClient
+
+from api.v1.code_store import MAX_CODE_ATTEMPTS, MemoryCodeStore, MongoCodeStore
+from models.LoginCode import LoginCode
+
+async def mongo_store() -> MongoCodeStore:
+    await init_beanie(database=AsyncMongoMockClient()["toko_test"], document_models=[LoginCode])
+    return MongoCodeStore()
+
+async def memory_store() -> MemoryCodeStore:
+    return MemoryCodeStore()
+
+def run_with_each_store(test):
+    for make_store in (memory_store, mongo_store):
+        async def run():
+            await test(await make_store())
+        asyncio.run(run())
+
+def test_code_is_consumed_once():
+    async def test(store):
+        created_at = await store.put("user", "hash")
+        assert await store.consume("user", "wrong") is None
+        # Mongo keeps milliseconds
+        assert abs(await store.consume("user", "hash") - created_at).total_seconds() < 0.001
+        assert await store.consume("user", "hash") is None
+
+    run_with_each_store(test)
+
+def test_code_is_dropped_after_max_attempts():
+    async def test(store):
+        await store.put("user", "hash")
+        for _ in range(MAX_CODE_ATTEMPTS):
+            assert await store.record_failure("user")
+        assert not await store.record_failure("user")
+        assert await store.consume("user", "hash") is None
+
+    run_with_each_store(test)
+
+def test_put_resets_attempts():
+    async def test(store):
+        await store.put("user", "old")
+        for _ in range(MAX_CODE_ATTEMPTS - 1):
+            await store.record_failure("user")
+        await store.put("user", "new")
+        assert await store.record_failure("user")
+        assert await store.consume("user", "new") is not None
+
+    run_with_each_store(test)
+
+def test_discard():
+    async def test(store):
+        await store.put("user", "hash")
+        await store.discard("user")
+        assert not await store.record_failure("user")
+        assert await store.consume("user", "hash") is None
+
+    run_with_each_store(test)
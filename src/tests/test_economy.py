@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+from beanie import init_beanie
+from mongomock_motor import AsyncMongoMockClient
+
+import utils.economy as economy
+from models.MemberEconomy import MemberEconomy
+from models.ServerEconomy import ServerEconomy
+
+@pytest.fixture(params=["server", "member"])
+def layout(request, monkeypatch):
+    monkeypatch.setattr(economy, "ECONOMY_LAYOUT", request.param)
+    monkeypatch.setattr(economy, "ledger", None)
+    return request.param
+
+async def init_models():
+    await init_beanie(database=AsyncMongoMockClient()["toko_test"], document_models=[ServerEconomy, MemberEconomy])
+
+def test_credit_survives_losing_the_create_race(layout, monkeypatch):
+    create_user = economy.create_user
+
+    async def lose_race(server_id, user_id):
+        # A concurrent command creates the member just before this one tries to
+        await create_user(server_id, user_id)
+        assert not await create_user(server_id, user_id)
+        return False
+
+    async def run():
+        await init_models()
+        monkeypatch.setattr(economy, "create_user", lose_race)
+        state = await economy.add_wallet("s", "new", 50)
+        assert state is not None
+        assert (state["wallet"], state["bank"]) == (economy.STARTING_WALLET + 50, economy.STARTING_BANK)
+
+    asyncio.run(run())
+
+def test_new_member_is_created_by_first_write(layout):
+    async def run():
+        await init_models()
+        state = await economy.add_wallet("s", "new", 50)
+        assert (state["wallet"], state["bank"]) == (economy.STARTING_WALLET + 50, economy.STARTING_BANK)
+
+    asyncio.run(run())
@@ -0,0 +1,96 @@
+import asyncio
+
+from utils.economy_ledger import EconomyLedger
+
+KEY = ("server", "user")
+
+def make_ledger(fail: bool = False, **kwargs) -> tuple[EconomyLedger, list]:
+    written = []
+
+    async def write_batch(batch):
+        if fail:
+            raise RuntimeError("mongo down")
+        written.append(batch)
+
+    return EconomyLedger(write_batch, **kwargs), written
+
+def test_view_includes_pending_deltas():
+    async def run():
+        ledger, _ = make_ledger(flush_interval=60)
+        ledger.observe(KEY, {"wallet": 100, "bank": 300})
+        ledger.add(KEY, wallet=25)
+        ledger.add(KEY, wallet=-5, bank=10)
+        assert ledger.view(KEY) == {"wallet": 120, "bank": 310}
+        await ledger.close()
+
+    asyncio.run(run())
+
+def test_unknown_member_has_no_view():
+    ledger, _ = make_ledger()
+    assert ledger.view(KEY) is None
+
+def test_flush_writes_one_summed_delta_per_member():
+    async def run():
+        ledger, written = make_ledger(flush_interval=60)
+        ledger.observe(KEY, {"wallet": 0, "bank": 0})
+        ledger.add(KEY, wallet=10)
+        ledger.add(KEY, wallet=5)
+        assert await ledger.flush()
+        assert written == [[("server", "user", 15, 0)]]
+        # The flushed delta is now part of the known Mongo state
+        assert ledger.view(KEY) == {"wallet": 15, "bank": 0}
+        assert ledger.stats()["pending_ops"] == 0
+        await ledger.close()
+
+    asyncio.run(run())
+
+def test_failed_flush_keeps_deltas():
+    async def run():
+        ledger, _ = make_ledger(fail=True, flush_interval=60)
+        ledger.observe(KEY, {"wallet": 0, "bank": 0})
+        ledger.add(KEY, wallet=10)
+        assert not await ledger.flush()
+        assert ledger.view(KEY) == {"wallet": 10, "bank": 0}
+        assert ledger.stats()["failed_flushes"] == 1
+        assert ledger.stats()["pending_ops"] == 1
+        await ledger.close()
+
+    asyncio.run(run())
+
+def test_take_and_restore():
+    async def run():
+        ledger, _ = make_ledger(flush_interval=60)
+        ledger.observe(KEY, {"wallet": 0, "bank": 0})
+        ledger.add(KEY, wallet=7, bank=3)
+        assert ledger.take(KEY) == (7, 3)
+        assert ledger.take(KEY) == (0, 0)
+        ledger.restore(KEY, 7, 3)
+        assert ledger.view(KEY) == {"wallet": 7, "bank": 3}
+        await ledger.close()
+
+    asyncio.run(run())
+
+def test_flush_ops_threshold_wakes_flush_loop():
+    async def run():
+        ledger, written = make_ledger(flush_interval=60, flush_ops=3)
+        ledger.observe(KEY, {"wallet": 0, "bank": 0})
+        for _ in range(3):
+            ledger.add(KEY, wallet=1)
+        await asyncio.sleep(0.05)
+        assert written == [[("server", "user", 3, 0)]]
+        await ledger.close()
+
+    asyncio.run(run())
+
+def test_eviction_keeps_members_with_pending_deltas():
+    async def run():
+        ledger, _ = make_ledger(flush_interval=60, max_known=2)
+        ledger.observe(("s", "a"), {"wallet": 0, "bank": 0})
+        ledger.add(("s", "a"), wallet=1)
+        ledger.observe(("s", "b"), {"wallet": 0, "bank": 0})
+        ledger.observe(("s", "c"), {"wallet": 0, "bank": 0})
+        assert ledger.view(("s", "a")) is not None
+        assert ledger.view(("s", "b")) is None
+        await ledger.close()
+
+    asyncio.run(run())
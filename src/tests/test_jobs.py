@@ -0,0 +1,69 @@
+import json
+import os
+
+import pytest
+
+pytest.importorskip("pyvolt")
+
+from utils.jobs import JobCatalog
+
+RARITY_WEIGHTS = {"common": 10, "rare": 2}
+
+def write_jobs(path, names: list[str], rarity: str = "common"):
+    path.write_text(json.dumps([
+        {"name": name, "min_income": 10, "max_income": 20, "rarity": rarity} for name in names
+    ]))
+
+@pytest.fixture
+def catalog(tmp_path) -> JobCatalog:
+    path = tmp_path / "jobs.json"
+    write_jobs(path, ["Barista", "Baker", "Bartender", "Delivery Driver", "YouTuber", "Astronaut"])
+    return JobCatalog(path, RARITY_WEIGHTS, "🪙", per_page=5, check_interval=0)
+
+def test_exact_match_ignores_case(catalog):
+    assert catalog.find("barista").name == "Barista"
+    assert catalog.find("  DELIVERY driver ").name == "Delivery Driver"
+
+def test_unique_prefix(catalog):
+    assert catalog.find("you").name == "YouTuber"
+    assert catalog.find("bart").name == "Bartender"
+
+def test_ambiguous_prefix_is_not_guessed(catalog):
+    assert [job.name for job in catalog.matches("ba")] == ["Baker", "Barista", "Bartender"]
+    assert [job.name for job in catalog.matches(" BAR")] == ["Barista", "Bartender"]
+    assert catalog.find("ba") is None
+    # Unique once it is long enough
+    assert catalog.find("bak").name == "Baker"
+
+def test_typo_is_matched_fuzzily(catalog):
+    assert catalog.find("astronot").name == "Astronaut"
+
+def test_no_match(catalog):
+    assert catalog.find("") is None
+    assert catalog.find("zzzzzzzz") is None
+    assert catalog.matches("zzzzzzzz") == []
+
+def test_success_chance_from_rarity(tmp_path):
+    path = tmp_path / "jobs.json"
+    write_jobs(path, ["Pilot"], rarity="rare")
+    job = JobCatalog(path, RARITY_WEIGHTS, "🪙").find("pilot")
+    assert job.success_chance == 0.2
+
+def test_pages(catalog):
+    pages = catalog.pages
+    assert len(pages) == 2
+    assert pages[0].title == "📋 Available Jobs (Page 1/2)"
+    assert "**Astronaut**" in pages[1].description
+
+def test_reloads_when_file_changes(catalog):
+    write_jobs(catalog.path, ["Chef"])
+    # Some filesystems have coarse mtimes
+    stat = os.stat(catalog.path)
+    os.utime(catalog.path, (stat.st_atime, stat.st_mtime + 10))
+    assert catalog.find("chef").name == "Chef"
+    assert catalog.find("barista") is None
+
+def test_broken_file_keeps_previous_catalog(catalog):
+    catalog.path.write_text("{not json")
+    assert not catalog.reload()
+    assert catalog.find("barista").name == "Barista"
@@ -0,0 +1,93 @@
+import asyncio
+import random
+
+from utils.leaderboard import Leaderboard, RankIndex
+
+def expected_order(scores: dict[str, int]) -> list[tuple[str, int]]:
+    return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+def test_rank_and_top_match_sorted_order():
+    rng = random.Random(5)
+    index = RankIndex(load=4)
+    scores = {}
+    for _ in range(2000):
+        member = f"m{rng.randrange(150)}"
+        if rng.random() < 0.1:
+            index.remove(member)
+            scores.pop(member, None)
+        else:
+            scores[member] = rng.randrange(50)
+            index.update(member, scores[member])
+
+    ordered = expected_order(scores)
+    assert len(index) == len(scores)
+    assert index.top(0, len(ordered)) == ordered
+    for position, (member, score) in enumerate(ordered, start=1):
+        assert index.rank(member) == position
+        assert index.score(member) == score
+
+def test_ties_are_ordered_by_member():
+    index = RankIndex()
+    for member in ("carol", "alice", "bob"):
+        index.update(member, 100)
+    assert index.top() == [("alice", 100), ("bob", 100), ("carol", 100)]
+    assert index.rank("bob") == 2
+
+def test_update_moves_member():
+    index = RankIndex()
+    index.update("a", 10)
+    index.update("b", 20)
+    assert index.rank("a") == 2
+    index.update("a", 30)
+    assert index.rank("a") == 1
+    assert index.top() == [("a", 30), ("b", 20)]
+
+def test_top_pages_across_buckets():
+    index = RankIndex(load=2)
+    for i in range(20):
+        index.update(f"m{i:02}", i)
+    assert index.top(offset=5, limit=3) == [("m14", 14), ("m13", 13), ("m12", 12)]
+    assert index.top(offset=19, limit=5) == [("m00", 0)]
+    assert index.top(offset=20) == []
+
+def test_unranked_member():
+    index = RankIndex()
+    assert index.rank("nobody") is None
+    index.remove("nobody")
+    assert len(index) == 0
+
+def test_leaderboard_loads_once_and_applies_records():
+    loads = []
+
+    async def loader(server_id):
+        loads.append(server_id)
+        await asyncio.sleep(0)
+        yield "a", 10
+        yield "b", 20
+
+    async def run():
+        board = Leaderboard(loader)
+        first, second = await asyncio.gather(board.get("s"), board.get("s"))
+        assert first is second
+        assert loads == ["s"]
+
+        board.record("s", "a", 50)
+        assert (await board.get("s")).top() == [("a", 50), ("b", 20)]
+        # Servers that aren't loaded are ignored
+        board.record("other", "x", 1)
+        assert board.stats()["servers"] == 1
+
+    asyncio.run(run())
+
+def test_leaderboard_evicts_least_recently_used_server():
+    async def loader(server_id):
+        yield "a", 1
+
+    async def run():
+        board = Leaderboard(loader, max_servers=2)
+        for server_id in ("s1", "s2", "s3"):
+            await board.get(server_id)
+        assert board.stats()["servers"] == 2
+        assert board._indexes.get("s1") is None
+
+    asyncio.run(run())
@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("pyvolt")
+
+from utils.log_burst import BurstCoalescer
+
+WINDOW = 0.05
+
+def make_coalescer(**kwargs) -> tuple[BurstCoalescer, list]:
+    delivered = []
+    coalescer = BurstCoalescer(lambda channel_id, embed: delivered.append(embed), window=WINDOW, **kwargs)
+    return coalescer, delivered
+
+def add(coalescer: BurstCoalescer, n: int, server_id: str = "s", event: int = 1):
+    for i in range(n):
+        coalescer.add(server_id, event, "log-channel", f"embed {i}", entry=f"entry {i}", summary_title="Deleted")
+
+def summaries(delivered: list) -> list:
+    return [embed for embed in delivered if not isinstance(embed, str)]
+
+def test_below_threshold_is_delivered_as_is():
+    async def run():
+        coalescer, delivered = make_coalescer(threshold=5)
+        add(coalescer, 5)
+        assert delivered == [f"embed {i}" for i in range(5)]
+        assert coalescer.stats()["active_bursts"] == 0
+
+    asyncio.run(run())
+
+def test_burst_is_summarised_once_quiet():
+    async def run():
+        coalescer, delivered = make_coalescer(threshold=2, max_listed=3)
+        add(coalescer, 7)
+        assert len(delivered) == 2
+        await asyncio.sleep(WINDOW * 3)
+
+        [summary] = summaries(delivered)
+        assert summary.title == "Deleted (5 in a burst)"
+        assert summary.description.splitlines() == ["entry 2", "entry 3", "entry 4", "…and 2 more"]
+        assert coalescer.stats() == {"active_bursts": 0, "coalesced": 5, "summaries": 1}
+
+    asyncio.run(run())
+
+def test_servers_and_events_are_counted_separately():
+    async def run():
+        coalescer, delivered = make_coalescer(threshold=2)
+        add(coalescer, 2, server_id="a")
+        add(coalescer, 2, server_id="b")
+        add(coalescer, 2, server_id="a", event=2)
+        assert len(delivered) == 6
+
+    asyncio.run(run())
+
+def test_max_hold_rollover_without_new_events_sends_no_empty_summary():
+    async def run():
+        coalescer, delivered = make_coalescer(threshold=1, max_hold=WINDOW)
+        add(coalescer, 2)
+        # Still active when the first check runs, so the burst is rolled over at max_hold...
+        await asyncio.sleep(WINDOW * 0.6)
+        add(coalescer, 1)
+        # ...and the rolled-over burst then stays empty until it goes quiet
+        await asyncio.sleep(WINDOW * 4)
+
+        [summary] = summaries(delivered)
+        assert summary.title == "Deleted (2 in a burst)"
+        assert coalescer.stats()["active_bursts"] == 0
+
+    asyncio.run(run())
+
+def test_close_flushes_held_bursts():
+    async def run():
+        coalescer, delivered = make_coalescer(threshold=1)
+        add(coalescer, 3)
+        await coalescer.close()
+        [summary] = summaries(delivered)
+        assert summary.title == "Deleted (2 in a burst)"
+
+    asyncio.run(run())
@@ -0,0 +1,102 @@
+from utils import message_cache
+from utils.message_cache import RECORD_OVERHEAD, CachedMessage, MessageCache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+def record(message_id: str, server_id: str = "s", content: str = "hello", attachments=()) -> CachedMessage:
+    return CachedMessage(message_id, server_id, "c", "a", content, attachments)
+
+def test_size_estimate():
+    r = record("m", content="abc", attachments=(("f.png", "https://x/f.png"),))
+    assert r.size == RECORD_OVERHEAD + 3 + len("f.png") + len("https://x/f.png")
+
+def test_get_pop_and_stats():
+    cache = MessageCache()
+    cache.put(record("m"))
+    assert cache.get("m").content == "hello"
+    assert cache.pop("m").content == "hello"
+    assert cache.get("m") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["messages"], stats["bytes"]) == (2, 1, 0, 0)
+
+def test_global_budget_evicts_oldest():
+    size = record("x").size
+    cache = MessageCache(max_bytes=size * 3, server_max_bytes=size * 3)
+    for i in range(4):
+        cache.put(record(f"m{i}", server_id=f"s{i}"))
+    assert cache.get("m0") is None
+    assert all(cache.get(f"m{i}") for i in (1, 2, 3))
+    assert cache.bytes == size * 3
+    assert cache.stats()["evictions"] == 1
+
+def test_server_budget_only_evicts_that_server():
+    size = record("x").size
+    cache = MessageCache(max_bytes=size * 100, server_max_bytes=size * 2)
+    cache.put(record("quiet", server_id="quiet"))
+    for i in range(5):
+        cache.put(record(f"busy{i}", server_id="busy"))
+    assert cache.get("quiet") is not None
+    assert [i for i in range(5) if cache.get(f"busy{i}")] == [3, 4]
+
+def test_oversized_record_is_not_cached():
+    cache = MessageCache(server_max_bytes=RECORD_OVERHEAD + 10)
+    cache.put(record("big", content="x" * 100))
+    assert len(cache) == 0
+
+def test_records_expire(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(message_cache.time, "monotonic", clock)
+    cache = MessageCache(max_age=60)
+    cache.put(record("old"))
+    clock.now += 30
+    cache.put(record("new"))
+    clock.now += 31
+    assert cache.get("old") is None
+    assert cache.get("new") is not None
+    # Expired records at the front are dropped on the next put
+    clock.now += 100
+    cache.put(record("newest"))
+    assert len(cache) == 1
+
+def test_update_content_keeps_age_and_order(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(message_cache.time, "monotonic", clock)
+    size = record("x").size
+    cache = MessageCache(max_bytes=size * 2 + 100, max_age=60)
+    cache.put(record("first"))
+    cache.put(record("second"))
+    clock.now += 30
+    cache.update_content("first", "edited")
+    assert cache.get("first").content == "edited"
+    assert cache.get("first").created_at == 1000.0
+    assert cache.bytes == record("first", content="edited").size + record("second").size
+
+    # Still the oldest, so it is evicted first
+    cache.put(record("third"))
+    assert cache.get("first") is None
+    assert cache.get("second") is not None
+
+def test_update_content_respects_budget():
+    size = record("x").size
+    cache = MessageCache(max_bytes=size * 2 + 10, server_max_bytes=size * 10)
+    cache.put(record("a"))
+    cache.put(record("b"))
+    cache.update_content("b", "hello" + "x" * 50)
+    assert cache.bytes <= cache.max_bytes
+    assert cache.get("a") is None
+
+def test_forget_server_and_clear():
+    cache = MessageCache()
+    cache.put(record("a", server_id="s1"))
+    cache.put(record("b", server_id="s2"))
+    cache.forget_server("s1")
+    assert cache.get("a") is None
+    assert cache.stats()["servers"] == 1
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.bytes == 0
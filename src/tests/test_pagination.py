@@ -0,0 +1,87 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("pyvolt")
+
+from utils.pagination import NEXT, PREVIOUS, PaginationManager, PaginationSession, TimerWheel
+
+def make_session(name: str = "m") -> PaginationSession:
+    return PaginationSession(SimpleNamespace(id=name), "owner", lambda page: page, 3, 0, 30)
+
+def advance(wheel: TimerWheel, ticks: int) -> list[list[PaginationSession]]:
+    return [wheel.advance() for _ in range(ticks)]
+
+def test_sessions_expire_in_due_order():
+    wheel = TimerWheel(tick=1, size=8)
+    a, b, c = make_session("a"), make_session("b"), make_session("c")
+    wheel.schedule(a, 3)
+    wheel.schedule(b, 1)
+    wheel.schedule(c, 3)
+
+    expired = advance(wheel, 4)
+    assert expired[0] == [b]
+    assert expired[1] == []
+    assert set(expired[2]) == {a, c}
+    assert expired[3] == []
+
+def test_delays_longer_than_the_wheel_wait_extra_rounds():
+    wheel = TimerWheel(tick=1, size=4)
+    session = make_session()
+    wheel.schedule(session, 10)
+    expired = advance(wheel, 10)
+    assert all(not tick for tick in expired[:9])
+    assert expired[9] == [session]
+
+def test_reschedule_and_cancel():
+    wheel = TimerWheel(tick=1, size=8)
+    kept, cancelled = make_session("kept"), make_session("cancelled")
+    wheel.schedule(kept, 2)
+    wheel.schedule(cancelled, 2)
+    wheel.schedule(kept, 5)
+    wheel.cancel(cancelled)
+
+    expired = advance(wheel, 5)
+    assert expired[1] == []
+    assert expired[4] == [kept]
+    assert cancelled.slot == -1
+
+class FakeMessage:
+    def __init__(self):
+        self.id = "message"
+        self.pages = []
+
+    async def react(self, emoji):
+        pass
+
+    async def edit(self, embeds):
+        self.pages.append(embeds[0])
+
+    async def remove_reaction(self, emoji, user_id):
+        pass
+
+def test_manager_turns_pages_for_the_owner_only():
+    message = FakeMessage()
+
+    async def reply(embeds, silent):
+        return message
+
+    ctx = SimpleNamespace(message=SimpleNamespace(reply=reply), author=SimpleNamespace(id="owner"))
+
+    async def run():
+        manager = PaginationManager(tick=60)
+        await manager.send(ctx, lambda page: f"page {page}", page_count=2)
+        await manager.handle_reaction(message.id, "someone else", NEXT)
+        await manager.handle_reaction(message.id, "owner", NEXT)
+        # Past the last page: nothing to edit
+        await manager.handle_reaction(message.id, "owner", NEXT)
+        await manager.handle_reaction(message.id, "owner", PREVIOUS)
+        assert message.pages == ["page 1", "page 0"]
+
+        manager.stop(message.id)
+        await manager.handle_reaction(message.id, "owner", NEXT)
+        assert message.pages == ["page 1", "page 0"]
+        await manager.close()
+
+    asyncio.run(run())
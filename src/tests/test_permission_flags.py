@@ -0,0 +1,31 @@
+from tools import permission_flags
+from tools.permission_flags import describe_flag_change, diff_flags, flag_names, format_flags
+
+MANAGE_CHANNEL = 1 << 0
+KICK = 1 << 6
+SEND = 1 << 22
+
+def test_diff_flags():
+    assert diff_flags(MANAGE_CHANNEL | KICK, KICK | SEND) == (SEND, MANAGE_CHANNEL)
+    assert diff_flags(KICK, KICK) == (0, 0)
+
+def test_flag_names_lowest_bit_first():
+    assert flag_names(SEND | MANAGE_CHANNEL) == ("ManageChannel", "SendMessage")
+    assert flag_names(0) == ()
+
+def test_unknown_bits():
+    assert flag_names(1 << 5) == ("Bit5",)
+    assert flag_names(1 << 40) == ("Bit40",)
+
+def test_format_flags():
+    assert format_flags(KICK | SEND) == "KickMembers, SendMessage"
+    assert format_flags(0) == "None"
+
+def test_describe_flag_change_lists_only_changes():
+    line = describe_flag_change("Permissions", MANAGE_CHANNEL | KICK, KICK | SEND)
+    assert line == "**Permissions:** + `SendMessage` − `ManageChannel`"
+    assert describe_flag_change("Permissions", KICK, KICK) is None
+
+def test_no_loop_variables_leak():
+    assert not hasattr(permission_flags, "_bit")
+    assert not hasattr(permission_flags, "_name")
@@ -0,0 +1,48 @@
+from utils import rate_limit
+from utils.rate_limit import TokenBucketLimiter
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+def test_burst_then_limited(monkeypatch):
+    monkeypatch.setattr(rate_limit.time, "monotonic", FakeClock())
+    limiter = TokenBucketLimiter(rate=1 / 10, capacity=3)
+    assert [limiter.acquire("k") for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert limiter.acquire("k") == 10.0
+    assert limiter.stats()["limited"] == 1
+
+def test_tokens_refill_over_time(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock)
+    limiter = TokenBucketLimiter(rate=1 / 10, capacity=2)
+    limiter.acquire("k")
+    limiter.acquire("k")
+
+    clock.now += 5
+    assert limiter.acquire("k") == 5.0
+    clock.now += 5
+    assert limiter.acquire("k") == 0.0
+    # Refills never exceed the capacity
+    clock.now += 1000
+    assert limiter.acquire("k") == 0.0
+    assert limiter.acquire("k") == 0.0
+    assert limiter.acquire("k") > 0
+
+def test_keys_are_independent():
+    limiter = TokenBucketLimiter(rate=1 / 60, capacity=1)
+    assert limiter.acquire(("1.2.3.4", "user")) == 0.0
+    assert limiter.acquire(("1.2.3.4", "user")) > 0
+    assert limiter.acquire(("5.6.7.8", "user")) == 0.0
+
+def test_least_recently_seen_key_is_evicted():
+    limiter = TokenBucketLimiter(rate=1 / 60, capacity=1, max_keys=2)
+    limiter.acquire("a")
+    limiter.acquire("b")
+    limiter.acquire("c")
+    assert limiter.stats()["keys"] == 2
+    # "a" was forgotten, so it has a full bucket again
+    assert limiter.acquire("a") == 0.0
@@ -1,5 +1,6 @@
 from models.User import User
 from models.ServerLogging import ServerLogging, Logs, LogConfig, LogCategory, MessageLogs, RoleLogs, ChannelLogs
+from utils.log_config import invalidate_log_settings
 from typing import Optional
 
 # === USER FUNCTIONS ===
@@ -71,3 +72,4 @@ async def set_log(server_id: str, category: str, log_type: str, channel_id: str,
 
     setattr(getattr(config.logs, category), log_type, LogConfig(enabled=enabled, channel_id=channel_id))
     await config.save()
+    invalidate_log_settings(server_id)
@@ -0,0 +1,102 @@
+"""Split legacy server_economy documents into per-member member_economy documents.
+
+Order matters:
+    1. Set ECONOMY_LAYOUT=member and restart every bot process.
+    2. Run this backfill; it can run while the bot is online.
+
+Members are written with $setOnInsert, so anyone the bot already moved (it seeds
+a member from the legacy map on first use) is never overwritten. Run before the
+flip, legacy writes made after the copy would never reach member_economy, and
+those members would revert to the copied values once the layout switched. The
+tool therefore refuses to run unless ECONOMY_LAYOUT=member is set for it too.
+
+Usage (from src/):
+    python -m tools.migrate_economy              # backfill member_economy
+    python -m tools.migrate_economy --prune      # also drop the migrated users maps
+"""
+import argparse
+import asyncio
+import logging
+import os
+
+from dotenv import load_dotenv
+
+from pymongo import UpdateOne
+from models.ServerEconomy import ServerEconomy
+from models.MemberEconomy import MemberEconomy
+from utils.mongodb import TokoDatabase
+
+logger = logging.getLogger("mongodb")
+
+async def migrate_server(server_doc: dict, batch_size: int = 1000) -> int:
+    """Copy every member of one legacy document into member_economy. Returns members written."""
+    server_id = server_doc["_id"]
+    users = server_doc.get("users") or {}
+    members = MemberEconomy.get_motor_collection()
+    written = 0
+
+    ops = []
+    for user_id, user in users.items():
+        ops.append(UpdateOne(
+            {"server_id": server_id, "user_id": user_id},
+            {"$setOnInsert": {
+                "server_id": server_id,
+                "user_id": user_id,
+                "wallet": user.get("wallet", 0),
+                "bank": user.get("bank", 0),
+                "last_daily": user.get("last_daily"),
+                "job": user.get("job"),
+            }},
+            upsert=True,
+        ))
+        if len(ops) >= batch_size:
+            result = await members.bulk_write(ops, ordered=False)
+            written += result.upserted_count
+            ops = []
+
+    if ops:
+        result = await members.bulk_write(ops, ordered=False)
+        written += result.upserted_count
+    return written
+
+async def migrate(prune: bool = False, batch_size: int = 1000):
+    servers = ServerEconomy.get_motor_collection()
+    total = 0
+
+    # Stream one server at a time so huge documents are never held together
+    async for server_doc in servers.find({"users": {"$exists": True}}):
+        written = await migrate_server(server_doc, batch_size)
+        total += written
+        logger.info(f"Migrated server {server_doc['_id']}: {written} new member documents")
+
+        if prune:
+            # Only drop entries that were in the snapshot we just copied
+            migrated = {f"users.{user_id}": "" for user_id in (server_doc.get("users") or {})}
+            if migrated:
+                await servers.update_one({"_id": server_doc["_id"]}, {"$unset": migrated})
+
+    logger.info(f"Economy migration finished: {total} member documents created")
+    return total
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--prune", action="store_true", help="remove migrated entries from server_economy.users")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    load_dotenv()
+    if os.getenv("ECONOMY_LAYOUT", "server").lower() != "member":
+        parser.error(
+            "ECONOMY_LAYOUT is not 'member'. Switch every bot process to ECONOMY_LAYOUT=member "
+            "first, then run the backfill with the same setting."
+        )
+
+    db = TokoDatabase()
+    await db.connect()
+    try:
+        await migrate(prune=args.prune, batch_size=args.batch_size)
+    finally:
+        await db.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 PERMISSION_FLAGS = {
     1 << 0: "ManageChannel",
     1 << 1: "ManageServer",
@@ -29,3 +31,42 @@ PERMISSION_FLAGS = {
     1 << 34: "DeafenMembers",
     1 << 35: "MoveMembers"
 }
+
+
+# === Diffing ===
+
+# Bit position -> flag name, so rendering only visits the bits that are set
+_BIT_NAMES = [PERMISSION_FLAGS.get(1 << position) for position in range(max(PERMISSION_FLAGS).bit_length())]
+
+@lru_cache(maxsize=2048)
+def flag_names(mask: int) -> tuple[str, ...]:
+    """Names of the flags set in `mask`, lowest bit first. Unknown bits show as `Bit<n>`."""
+    names = []
+    while mask:
+        low = mask & -mask
+        position = low.bit_length() - 1
+        name = _BIT_NAMES[position] if position < len(_BIT_NAMES) else None
+        names.append(name or f"Bit{position}")
+        mask ^= low
+    return tuple(names)
+
+@lru_cache(maxsize=2048)
+def format_flags(mask: int) -> str:
+    return ", ".join(flag_names(mask)) or "None"
+
+def diff_flags(before: int, after: int) -> tuple[int, int]:
+    """Return the (added, removed) bits between two masks."""
+    changed = before ^ after
+    return changed & after, changed & before
+
+def describe_flag_change(label: str, before: int, after: int) -> str | None:
+    """One log line listing only the flags added and removed, or None if nothing changed."""
+    added, removed = diff_flags(before, after)
+    if not added and not removed:
+        return None
+    parts = []
+    if added:
+        parts.append(f"+ `{format_flags(added)}`")
+    if removed:
+        parts.append(f"− `{format_flags(removed)}`")
+    return f"**{label}:** " + " ".join(parts)
@@ -0,0 +1,28 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+class CommandScope:
+    """State shared by everything one command invocation touches."""
+    __slots__ = ("cache", "queries")
+
+    def __init__(self):
+        # Reads memoised for the lifetime of the command, keyed by (kind, *ids)
+        self.cache: dict = {}
+        # Mongo commands issued, counted by utils.mongo_monitor
+        self.queries = 0
+
+_current: ContextVar[CommandScope | None] = ContextVar("toko_command_scope", default=None)
+
+def current_scope() -> CommandScope | None:
+    """Return the scope of the command being run, or None outside a command."""
+    return _current.get()
+
+@contextmanager
+def command_scope():
+    """Open a fresh CommandScope for the duration of a command."""
+    scope = CommandScope()
+    token = _current.set(scope)
+    try:
+        yield scope
+    finally:
+        _current.reset(token)
@@ -0,0 +1,98 @@
+import heapq
+import logging
+import time
+from datetime import datetime, timezone
+
+from models.Cooldown import Cooldown
+
+logger = logging.getLogger("toko")
+
+class CooldownBucket:
+    """Cooldowns for one command, keyed by user (or any string).
+
+    Only keys that are currently cooling down are stored: a min-heap ordered by
+    expiry evicts them as they lapse, so memory tracks recent activity rather
+    than the member count. Persistent buckets also write each cooldown to the
+    `cooldowns` collection, whose TTL index removes it once it has expired.
+    """
+    __slots__ = ("name", "seconds", "persist", "_expiries", "_heap")
+
+    def __init__(self, name: str, seconds: float, persist: bool = False):
+        self.name = name
+        self.seconds = seconds
+        self.persist = persist
+        self._expiries: dict[str, float] = {}
+        self._heap: list[tuple[float, str]] = []
+
+    def __len__(self) -> int:
+        return len(self._expiries)
+
+    def _evict(self, now: float):
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            expires_at, key = heapq.heappop(heap)
+            # Skip heap entries left behind by a later trigger of the same key
+            if self._expiries.get(key) == expires_at:
+                del self._expiries[key]
+
+    def remaining(self, key: str) -> float:
+        """Seconds left on `key`'s cooldown, or 0 if it can run."""
+        now = time.time()
+        self._evict(now)
+        expires_at = self._expiries.get(key)
+        return expires_at - now if expires_at else 0.0
+
+    async def trigger(self, key: str):
+        """Start `key`'s cooldown."""
+        now = time.time()
+        self._evict(now)
+        self._set(key, now + self.seconds)
+
+        if self.persist:
+            try:
+                await Cooldown.get_motor_collection().update_one(
+                    {"_id": f"{self.name}:{key}"},
+                    {"$set": {
+                        "bucket": self.name,
+                        "key": key,
+                        "expires_at": datetime.fromtimestamp(now + self.seconds, timezone.utc),
+                    }},
+                    upsert=True,
+                )
+            except Exception as e:
+                # The in-memory cooldown still applies until restart
+                logger.error(f"Failed to persist cooldown {self.name}:{key}: {e}")
+
+    def _set(self, key: str, expires_at: float):
+        self._expiries[key] = expires_at
+        heapq.heappush(self._heap, (expires_at, key))
+
+    async def load(self) -> int:
+        """Restore unexpired cooldowns from Mongo. Returns how many were loaded."""
+        now = datetime.now(timezone.utc)
+        count = 0
+        cursor = Cooldown.get_motor_collection().find(
+            {"bucket": self.name, "expires_at": {"$gt": now}}, {"key": 1, "expires_at": 1}
+        )
+        async for doc in cursor:
+            expires_at = doc["expires_at"]
+            if expires_at.tzinfo is None:
+                expires_at = expires_at.replace(tzinfo=timezone.utc)
+            self._set(doc["key"], expires_at.timestamp())
+            count += 1
+        return count
+
+_buckets: dict[str, CooldownBucket] = {}
+
+def cooldown_bucket(name: str, seconds: float, persist: bool = False) -> CooldownBucket:
+    """Return the bucket called `name`, creating it on first use."""
+    bucket = _buckets.get(name)
+    if bucket is None:
+        bucket = _buckets[name] = CooldownBucket(name, seconds, persist)
+    return bucket
+
+async def load_persistent_cooldowns():
+    for bucket in _buckets.values():
+        if bucket.persist:
+            count = await bucket.load()
+            logger.info(f"Restored {count} '{bucket.name}' cooldowns")
@@ -1,7 +1,27 @@
-from models.ServerEconomy import ServerEconomy, UserEconomy
+from models.ServerEconomy import ServerEconomy
+from models.MemberEconomy import MemberEconomy
+from utils.command_scope import current_scope
+from utils.economy_ledger import EconomyLedger
+from utils.leaderboard import Leaderboard
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
 from datetime import datetime, timedelta
+import os
 import pytz
 
+# "server" keeps every member inside ServerEconomy.users, "member" stores one
+# MemberEconomy document per (server, user). To migrate, flip every process to
+# "member" first, then run tools/migrate_economy.py to backfill; a backfill made
+# before the flip misses later legacy writes.
+ECONOMY_LAYOUT = os.getenv("ECONOMY_LAYOUT", "server").lower()
+
+STARTING_WALLET = 0
+STARTING_BANK = 300
+DAILY_COOLDOWN_HOURS = 24
+
+def uses_member_layout() -> bool:
+    return ECONOMY_LAYOUT == "member"
+
 async def get_or_create_server_economy(server_id: str) -> ServerEconomy:
     """Retrieve or create the ServerEconomy document for a server."""
     econ = await ServerEconomy.get(server_id)
@@ -10,74 +30,337 @@ async def get_or_create_server_economy(server_id: str) -> ServerEconomy:
         await econ.insert()
     return econ
 
+async def get_legacy_user(server_id: str, user_id: str) -> dict | None:
+    """Read a single member entry from the legacy ServerEconomy document, if any."""
+    doc = await ServerEconomy.get_motor_collection().find_one(
+        {"_id": server_id}, {f"users.{user_id}": 1}
+    )
+    return ((doc or {}).get("users") or {}).get(user_id)
+
+def _target(server_id: str, user_id: str):
+    """Return (collection, filter, field prefix) addressing one member in the active layout."""
+    if uses_member_layout():
+        return MemberEconomy.get_motor_collection(), {"server_id": server_id, "user_id": user_id}, ""
+    return (
+        ServerEconomy.get_motor_collection(),
+        {"_id": server_id, f"users.{user_id}": {"$exists": True}},
+        f"users.{user_id}.",
+    )
+
+def _projection(user_id: str) -> dict:
+    if uses_member_layout():
+        return {"_id": 0, "wallet": 1, "bank": 1, "last_daily": 1, "job": 1}
+    return {"_id": 0, f"users.{user_id}": 1}
+
+def _extract(doc: dict | None, user_id: str) -> dict | None:
+    if doc is None:
+        return None
+    if not uses_member_layout():
+        doc = doc["users"][user_id]
+    return {
+        "wallet": doc.get("wallet", 0),
+        "bank": doc.get("bank", 0),
+        "last_daily": doc.get("last_daily"),
+        "job": doc.get("job"),
+    }
+
+async def create_user(server_id: str, user_id: str) -> bool:
+    """Create a user with the starting balance in one upsert. Returns True if they were new."""
+    if uses_member_layout():
+        seed = await get_legacy_user(server_id, user_id) or {"wallet": STARTING_WALLET, "bank": STARTING_BANK}
+        result = await MemberEconomy.get_motor_collection().update_one(
+            {"server_id": server_id, "user_id": user_id},
+            {"$setOnInsert": {
+                "wallet": seed.get("wallet", 0),
+                "bank": seed.get("bank", 0),
+                "last_daily": seed.get("last_daily"),
+                "job": seed.get("job"),
+            }},
+            upsert=True,
+        )
+        return result.upserted_id is not None
+
+    try:
+        result = await ServerEconomy.get_motor_collection().update_one(
+            {"_id": server_id, f"users.{user_id}": {"$exists": False}},
+            {
+                "$set": {f"users.{user_id}": {
+                    "wallet": STARTING_WALLET, "bank": STARTING_BANK, "last_daily": None, "job": None,
+                }},
+                "$setOnInsert": {"enabled": True},
+            },
+            upsert=True,
+        )
+    except DuplicateKeyError:
+        # The server document exists and already has this user
+        return False
+    return result.upserted_id is not None or result.modified_count > 0
+
+async def _find_and_update(server_id: str, user_id: str, update: dict, guard: dict | None) -> dict | None:
+    collection, member_query, prefix = _target(server_id, user_id)
+    query = dict(member_query)
+    for field, condition in (guard or {}).items():
+        if field == "$or":
+            query["$or"] = [{prefix + k: v for k, v in clause.items()} for clause in condition]
+        else:
+            query[prefix + field] = condition
+    update_doc = {op: {prefix + k: v for k, v in fields.items()} for op, fields in update.items()}
+
+    doc = await collection.find_one_and_update(
+        query, update_doc, projection=_projection(user_id), return_document=ReturnDocument.AFTER
+    )
+    # No match: either the guard rejected it or the member doesn't exist yet. Only
+    # the latter is worth an upsert, which would fail on an existing member anyway.
+    if doc is None and guard and await _member_exists(collection, member_query, server_id, user_id):
+        return None
+    if doc is None:
+        # Retry whether this created the member or a concurrent command got there first
+        await create_user(server_id, user_id)
+        doc = await collection.find_one_and_update(
+            query, update_doc, projection=_projection(user_id), return_document=ReturnDocument.AFTER
+        )
+    return _extract(doc, user_id)
+
+async def _member_exists(collection, member_query: dict, server_id: str, user_id: str) -> bool:
+    scope = current_scope()
+    if scope is not None and ("economy", server_id, user_id) in scope.cache:
+        return True
+    return await collection.find_one(member_query, {"_id": 1}) is not None
+
+def _fold_deltas(update: dict, guard: dict | None, wallet: int, bank: int):
+    """Merge unflushed ledger deltas into an update and shift its balance guards to match."""
+    if not wallet and not bank:
+        return update, guard
+
+    update = {op: dict(fields) for op, fields in update.items()}
+    inc = update.setdefault("$inc", {})
+    deltas = {"wallet": wallet, "bank": bank}
+    for field, delta in deltas.items():
+        if delta:
+            inc[field] = inc.get(field, 0) + delta
+
+    if guard:
+        guard = dict(guard)
+        for field, delta in deltas.items():
+            condition = guard.get(field)
+            if isinstance(condition, dict) and "$gte" in condition:
+                # "stored + delta >= n" is "stored >= n - delta"
+                guard[field] = {**condition, "$gte": condition["$gte"] - delta}
+    return update, guard
+
+async def apply_update(server_id: str, user_id: str, update: dict, guard: dict | None = None) -> dict | None:
+    """Atomically apply `update` to a member if `guard` matches and return the new balances.
+
+    Field names in `update` and `guard` are relative to the member (e.g. "wallet").
+    Costs one find_one_and_update; a user seen for the first time is created and the
+    update retried once. Returns None if the guard rejected the update, which costs
+    one more lookup unless the member was already read in this command.
+    """
+    if ledger is None:
+        return _remember(server_id, user_id, await _find_and_update(server_id, user_id, update, guard))
+
+    key = (server_id, user_id)
+    async with ledger.lock:
+        # Write the member's unflushed deltas together with this update
+        wallet, bank = ledger.take(key)
+        update, guard = _fold_deltas(update, guard, wallet, bank)
+        state = await _find_and_update(server_id, user_id, update, guard)
+        if state is None:
+            ledger.restore(key, wallet, bank)
+            return None
+        ledger.observe(key, state)
+    return _remember(server_id, user_id, ledger.view(key))
+
+async def _write_deltas(batch: list[tuple[str, str, int, int]]):
+    """Flush ledger deltas as one unordered bulk write of $inc updates."""
+    ops = []
+    collection = None
+    for server_id, user_id, wallet, bank in batch:
+        collection, query, prefix = _target(server_id, user_id)
+        ops.append(UpdateOne(query, {"$inc": {prefix + "wallet": wallet, prefix + "bank": bank}}))
+    if ops:
+        await collection.bulk_write(ops, ordered=False)
+
+# Optional write-behind mode: wallet changes from gambling are buffered in memory and
+# flushed every ECONOMY_FLUSH_MS or ECONOMY_FLUSH_OPS deltas. Each server's members must
+# only be written by one process while this is on.
+WRITE_BEHIND = os.getenv("ECONOMY_WRITE_BEHIND", "false").lower() in ("1", "true", "yes")
+ledger: EconomyLedger | None = EconomyLedger(
+    _write_deltas,
+    flush_interval=int(os.getenv("ECONOMY_FLUSH_MS", "500")) / 1000,
+    flush_ops=int(os.getenv("ECONOMY_FLUSH_OPS", "500")),
+) if WRITE_BEHIND else None
+
+async def _apply_buffered(server_id: str, user_id: str, delta: int, stake: int | None = None) -> dict | None:
+    """Queue a wallet delta in the ledger, checking `stake` against the buffered balance."""
+    key = (server_id, user_id)
+    if ledger.view(key) is None:
+        state = await get_user_state(server_id, user_id)
+        ledger.observe(key, state, replace=False)
+
+    # No awaits from here on, so the check and the delta can't be split by another command
+    state = ledger.view(key)
+    if stake is not None and state["wallet"] < stake:
+        return None
+    ledger.add(key, wallet=delta)
+    return _remember(server_id, user_id, ledger.view(key))
+
+def _remember(server_id: str, user_id: str, state: dict | None) -> dict | None:
+    """Record the latest known state of a member for the current command and the leaderboard."""
+    if state is None:
+        return None
+    scope = current_scope()
+    if scope is not None:
+        scope.cache[("economy", server_id, user_id)] = state
+    leaderboard.record(server_id, user_id, state["wallet"] + state["bank"])
+    return state
+
+def _wealth(server_id: str, user_id: str, fields: dict) -> int:
+    # Prefer this process's view, which includes unflushed ledger deltas
+    state = (ledger.view((server_id, user_id)) if ledger is not None else None) or fields
+    return state.get("wallet", 0) + state.get("bank", 0)
+
+async def iter_server_wealth(server_id: str):
+    """Yield (user_id, wallet + bank) for every member of a server's economy."""
+    if uses_member_layout():
+        cursor = MemberEconomy.get_motor_collection().find(
+            {"server_id": server_id}, {"_id": 0, "user_id": 1, "wallet": 1, "bank": 1}
+        )
+        async for doc in cursor:
+            yield doc["user_id"], _wealth(server_id, doc["user_id"], doc)
+        return
+
+    # Only this server's document, and of each member only the balances
+    cursor = ServerEconomy.get_motor_collection().aggregate([
+        {"$match": {"_id": server_id}},
+        {"$project": {"_id": 0, "users": {"$map": {
+            "input": {"$objectToArray": {"$ifNull": ["$users", {}]}},
+            "in": {"user_id": "$$this.k", "wallet": "$$this.v.wallet", "bank": "$$this.v.bank"},
+        }}}},
+    ])
+    async for doc in cursor:
+        for user in doc["users"]:
+            yield user["user_id"], _wealth(server_id, user["user_id"], user)
+
+# Total wealth rankings per server, loaded on first use and kept current by _remember
+leaderboard = Leaderboard(
+    iter_server_wealth,
+    reload_after=int(os.getenv("LEADERBOARD_RELOAD_SECONDS", "600")),
+    max_servers=int(os.getenv("LEADERBOARD_MAX_SERVERS", "1000")),
+)
+
+async def read_user(server_id: str, user_id: str) -> dict | None:
+    """Fetch just one member's fields with a projection, skipping model validation.
+
+    Returns None if the user has no economy entry yet.
+    """
+    if ledger is not None:
+        # The ledger holds the freshest state, including unflushed deltas
+        state = ledger.view((server_id, user_id))
+        if state is not None:
+            return _remember(server_id, user_id, state)
+    else:
+        scope = current_scope()
+        if scope is not None:
+            state = scope.cache.get(("economy", server_id, user_id))
+            if state is not None:
+                return state
+
+    collection, query, _ = _target(server_id, user_id)
+    state = _extract(await collection.find_one(query, _projection(user_id)), user_id)
+    if ledger is not None and state is not None:
+        ledger.observe((server_id, user_id), state, replace=False)
+        state = ledger.view((server_id, user_id))
+    return _remember(server_id, user_id, state)
+
+async def get_user_state(server_id: str, user_id: str) -> dict:
+    """Return wallet/bank/last_daily/job for a user, creating them if needed.
+
+    Within a command this reads Mongo at most once per member.
+    """
+    state = await read_user(server_id, user_id)
+    if state is None:
+        await create_user(server_id, user_id)
+        state = await read_user(server_id, user_id)
+    return state
+
+async def flush_ledger():
+    """Write any buffered economy deltas to Mongo and stop the flush loop."""
+    if ledger is not None:
+        await ledger.close()
+
 async def ensure_user(server_id: str, user_id: str):
     """Ensure a user exists in the economy. Starts with 0 wallet and 300 in bank."""
-    econ = await get_or_create_server_economy(server_id)
-    if user_id not in econ.users:
-        econ.users[user_id] = UserEconomy(wallet=0, bank=300, job=None)
-        await econ.save()
+    await create_user(server_id, user_id)
 
 async def get_balance(server_id: str, user_id: str) -> dict:
     """Return the wallet and bank balance of a user in a server."""
-    await ensure_user(server_id, user_id)
-    econ = await ServerEconomy.get(server_id)
-    user = econ.users[user_id]
-    return {"wallet": user.wallet, "bank": user.bank}
+    state = await get_user_state(server_id, user_id)
+    return {"wallet": state["wallet"], "bank": state["bank"]}
 
-async def add_wallet(server_id: str, user_id: str, amount: int):
-    """Add coins to a user’s wallet in a server."""
-    await ensure_user(server_id, user_id)
-    econ = await ServerEconomy.get(server_id)
-    econ.users[user_id].wallet += amount
-    await econ.save()
+async def add_wallet(server_id: str, user_id: str, amount: int) -> dict:
+    """Add coins to a user’s wallet in a server. Returns the new balances."""
+    if ledger is not None:
+        return await _apply_buffered(server_id, user_id, amount)
+    return await apply_update(server_id, user_id, {"$inc": {"wallet": amount}})
 
-async def deposit(server_id: str, user_id: str, amount: int) -> bool:
-    """Move coins from wallet to bank. Returns True if successful."""
-    await ensure_user(server_id, user_id)
-    econ = await ServerEconomy.get(server_id)
-    user = econ.users[user_id]
-    if user.wallet >= amount:
-        user.wallet -= amount
-        user.bank += amount
-        await econ.save()
-        return True
-    return False
+async def settle_bet(server_id: str, user_id: str, stake: int, delta: int) -> dict | None:
+    """Apply a gamble's outcome if the wallet still covers the stake.
 
-async def withdraw(server_id: str, user_id: str, amount: int) -> bool:
-    """Move coins from bank to wallet. Returns True if successful."""
-    await ensure_user(server_id, user_id)
-    econ = await ServerEconomy.get(server_id)
-    user = econ.users[user_id]
-    if user.bank >= amount:
-        user.bank -= amount
-        user.wallet += amount
-        await econ.save()
-        return True
-    return False
+    Returns the new balances, or None if the wallet holds less than `stake`.
+    """
+    if ledger is not None:
+        return await _apply_buffered(server_id, user_id, delta, stake)
+    return await apply_update(
+        server_id, user_id, {"$inc": {"wallet": delta}}, guard={"wallet": {"$gte": stake}}
+    )
+
+async def deposit(server_id: str, user_id: str, amount: int) -> dict | None:
+    """Move coins from wallet to bank. Returns the new balances, or None if the wallet is short."""
+    return await apply_update(
+        server_id, user_id, {"$inc": {"wallet": -amount, "bank": amount}}, guard={"wallet": {"$gte": amount}}
+    )
+
+async def withdraw(server_id: str, user_id: str, amount: int) -> dict | None:
+    """Move coins from bank to wallet. Returns the new balances, or None if the bank is short."""
+    return await apply_update(
+        server_id, user_id, {"$inc": {"wallet": amount, "bank": -amount}}, guard={"bank": {"$gte": amount}}
+    )
+
+def _as_utc(value: datetime | str | None) -> datetime | None:
+    """Normalize a stored last_daily: Mongo returns naive UTC datetimes, older documents ISO strings."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value if value.tzinfo else value.replace(tzinfo=pytz.utc)
 
 async def can_claim_daily(server_id: str, user_id: str) -> bool:
     """Check if a user can claim daily coins (once every 24h)."""
-    await ensure_user(server_id, user_id)
-    econ = await ServerEconomy.get(server_id)
-    user = econ.users[user_id]
-    if not user.last_daily:
+    state = await get_user_state(server_id, user_id)
+    last = _as_utc(state["last_daily"])
+    if last is None:
         return True
-    last = datetime.fromisoformat(user.last_daily)
     now = datetime.now(pytz.utc)
-    return (now - last) >= timedelta(hours=24)
+    return (now - last) >= timedelta(hours=DAILY_COOLDOWN_HOURS)
 
-async def claim_daily(server_id: str, user_id: str, amount: int = 500) -> bool:
-    """Claim the daily reward. Returns True if claimed, False if on cooldown."""
-    if not await can_claim_daily(server_id, user_id):
-        return False
-    econ = await ServerEconomy.get(server_id)
-    user = econ.users[user_id]
-    user.wallet += amount
-    user.last_daily = datetime.now(pytz.utc).isoformat()
-    await econ.save()
-    return True
+async def claim_daily(server_id: str, user_id: str, amount: int = 500) -> dict | None:
+    """Claim the daily reward. Returns the new balances, or None if on cooldown.
 
-async def update_job(server_id: str, user_id: str, job_name: str):
-    econ = await ServerEconomy.get(server_id)
-    econ.users[user_id].job = job_name
-    await econ.save()
+    The cooldown is checked in the update filter, so two concurrent claims can't both pay out.
+    """
+    now = datetime.now(pytz.utc)
+    cutoff = now - timedelta(hours=DAILY_COOLDOWN_HOURS)
+    return await apply_update(
+        server_id, user_id,
+        {"$inc": {"wallet": amount}, "$set": {"last_daily": now}},
+        guard={"$or": [
+            {"last_daily": None},
+            {"last_daily": {"$type": "date", "$lte": cutoff}},
+            # Claims stored before last_daily became a date; rewritten as one on their next claim
+            {"last_daily": {"$type": "string", "$lte": cutoff.isoformat()}},
+        ]},
+    )
+
+async def update_job(server_id: str, user_id: str, job_name: str) -> dict:
+    return await apply_update(server_id, user_id, {"$set": {"job": job_name}})
@@ -0,0 +1,182 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable
+
+logger = logging.getLogger("toko")
+
+Key = tuple[str, str]  # (server_id, user_id)
+
+class EconomyLedger:
+    """Write-behind buffer for wallet/bank deltas.
+
+    Deltas are applied in memory and flushed to Mongo as one unordered bulk
+    write every `flush_interval` seconds or once `flush_ops` deltas queue up.
+    The ledger also remembers the last state it saw in Mongo for each member,
+    so reads in this process see their own unflushed writes without a query.
+    """
+
+    def __init__(
+        self,
+        write_batch: Callable[[list[tuple[str, str, int, int]]], Awaitable[None]],
+        flush_interval: float = 0.5,
+        flush_ops: int = 500,
+        max_known: int = 50_000,
+    ):
+        self._write_batch = write_batch
+        self.flush_interval = flush_interval
+        self.flush_ops = flush_ops
+        self.max_known = max_known
+
+        self._known: OrderedDict[Key, dict] = OrderedDict()  # state as last seen in Mongo
+        self._pending: dict[Key, list[int]] = {}  # [wallet, bank] not yet flushed
+        self._inflight: dict[Key, list[int]] = {}  # [wallet, bank] being flushed right now
+        self._pending_ops = 0
+
+        # Held by flushes and by direct Mongo writes so the two never interleave
+        self.lock = asyncio.Lock()
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+        self.flushes = 0
+        self.flushed_ops = 0
+        self.failed_flushes = 0
+        self.last_flush_ms = 0.0
+        self.total_flush_ms = 0.0
+
+    # === State ===
+
+    def view(self, key: Key) -> dict | None:
+        """Return the member's state including unflushed deltas, or None if unknown."""
+        base = self._known.get(key)
+        if base is None:
+            return None
+        self._known.move_to_end(key)
+
+        state = dict(base)
+        for deltas in (self._inflight.get(key), self._pending.get(key)):
+            if deltas:
+                state["wallet"] += deltas[0]
+                state["bank"] += deltas[1]
+        return state
+
+    def observe(self, key: Key, state: dict, replace: bool = True):
+        """Record the member's state as stored in Mongo (excluding pending deltas)."""
+        if not replace and key in self._known:
+            return
+        self._known[key] = dict(state)
+        self._known.move_to_end(key)
+        self._evict()
+
+    def _evict(self):
+        excess = len(self._known) - self.max_known
+        if excess <= 0:
+            return
+        # Oldest first, but never forget a member whose deltas aren't in Mongo yet
+        for key in list(self._known):
+            if excess <= 0:
+                break
+            if key not in self._pending and key not in self._inflight:
+                del self._known[key]
+                excess -= 1
+
+    def add(self, key: Key, wallet: int = 0, bank: int = 0):
+        """Queue a delta for a member already known to the ledger."""
+        deltas = self._pending.setdefault(key, [0, 0])
+        deltas[0] += wallet
+        deltas[1] += bank
+        self._pending_ops += 1
+
+        self._ensure_running()
+        if self._pending_ops >= self.flush_ops:
+            self._wake.set()
+
+    def take(self, key: Key) -> tuple[int, int]:
+        """Remove and return the member's pending delta so a direct write can include it."""
+        deltas = self._pending.pop(key, None)
+        return (deltas[0], deltas[1]) if deltas else (0, 0)
+
+    def restore(self, key: Key, wallet: int, bank: int):
+        """Put back a delta returned by take() whose write did not go through."""
+        if wallet or bank:
+            deltas = self._pending.setdefault(key, [0, 0])
+            deltas[0] += wallet
+            deltas[1] += bank
+
+    # === Flushing ===
+
+    def _ensure_running(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    async def flush(self) -> bool:
+        """Write every pending delta to Mongo. Returns False if the write failed."""
+        async with self.lock:
+            if not self._pending:
+                return True
+
+            self._inflight, self._pending = self._pending, {}
+            ops, self._pending_ops = self._pending_ops, 0
+            batch = [(server_id, user_id, w, b) for (server_id, user_id), (w, b) in self._inflight.items() if w or b]
+
+            start = time.perf_counter()
+            try:
+                if batch:
+                    await self._write_batch(batch)
+            except Exception as e:
+                # Keep the deltas for the next attempt
+                for key, (w, b) in self._inflight.items():
+                    self.restore(key, w, b)
+                self._pending_ops += ops
+                self.failed_flushes += 1
+                logger.error(f"Economy ledger flush of {len(batch)} members failed: {e}")
+                return False
+            else:
+                for key, (w, b) in self._inflight.items():
+                    state = self._known.get(key)
+                    if state is not None:
+                        state["wallet"] += w
+                        state["bank"] += b
+                self.flushes += 1
+                self.flushed_ops += ops
+                self.last_flush_ms = (time.perf_counter() - start) * 1000
+                self.total_flush_ms += self.last_flush_ms
+                return True
+            finally:
+                self._inflight = {}
+                self._evict()
+
+    async def close(self):
+        """Stop the flush loop and write whatever is still pending."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        if not await self.flush():
+            logger.error(f"Economy ledger shut down with {len(self._pending)} members unflushed")
+
+    def stats(self) -> dict:
+        return {
+            "pending_members": len(self._pending),
+            "pending_ops": self._pending_ops,
+            "known_members": len(self._known),
+            "flushes": self.flushes,
+            "flushed_ops": self.flushed_ops,
+            "failed_flushes": self.failed_flushes,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+            "avg_flush_ms": round(self.total_flush_ms / self.flushes, 2) if self.flushes else 0.0,
+        }
@@ -0,0 +1,148 @@
+import asyncio
+import itertools
+import json
+import logging
+import os
+from typing import Any, Awaitable, Callable
+
+logger = logging.getLogger("toko")
+
+IPC_SOCKET = os.getenv("TOKO_IPC_SOCKET", "/tmp/toko-ipc.sock")
+
+Handler = Callable[..., Awaitable[Any]]
+
+class IPCError(Exception):
+    """A request failed on the bot side, or the bot could not be reached.
+
+    `status` follows HTTP codes so the API can pass it straight through.
+    """
+
+    def __init__(self, message: str, status: int = 500):
+        super().__init__(message)
+        self.status = status
+
+class IPCServer:
+    """Newline-delimited JSON requests over a Unix socket, served by the bot.
+
+    A request is {"id", "op", "args"} and the reply is {"id", "ok", "result"}
+    or {"id", "ok": false, "error", "status"}. Requests on one connection are
+    handled concurrently and may be answered out of order.
+    """
+
+    def __init__(self, path: str = IPC_SOCKET):
+        self.path = path
+        self.handlers: dict[str, Handler] = {}
+        self._server: asyncio.AbstractServer | None = None
+        self._connections: set[asyncio.StreamWriter] = set()
+
+    def register(self, op: str, handler: Handler):
+        self.handlers[op] = handler
+
+    async def start(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._server = await asyncio.start_unix_server(self._serve, path=self.path)
+        os.chmod(self.path, 0o660)
+        logger.info(f"IPC listening on {self.path} ({', '.join(sorted(self.handlers))})")
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._connections):
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        tasks = set()
+        self._connections.add(writer)
+        try:
+            while line := await reader.readline():
+                task = asyncio.create_task(self._handle(line, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except ConnectionError:
+            pass
+        finally:
+            self._connections.discard(writer)
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    async def _handle(self, line: bytes, writer: asyncio.StreamWriter):
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get("id")
+            handler = self.handlers.get(request.get("op"))
+            if handler is None:
+                raise IPCError(f"Unknown operation {request.get('op')!r}", status=400)
+            reply = {"id": request_id, "ok": True, "result": await handler(**request.get("args", {}))}
+        except IPCError as e:
+            reply = {"id": request_id, "ok": False, "error": str(e), "status": e.status}
+        except Exception as e:
+            logger.exception(f"IPC request failed: {e}")
+            reply = {"id": request_id, "ok": False, "error": "Internal error", "status": 500}
+
+        writer.write(json.dumps(reply).encode() + b"\n")
+        await writer.drain()
+
+class IPCClient:
+    """Client for IPCServer. One connection per process, shared by concurrent requests."""
+
+    def __init__(self, path: str = IPC_SOCKET, timeout: float = 10.0):
+        self.path = path
+        self.timeout = timeout
+        self._ids = itertools.count(1)
+        self._pending: dict[int, asyncio.Future] = {}
+        self._writer: asyncio.StreamWriter | None = None
+        self._reader_task: asyncio.Task | None = None
+        self._connect_lock = asyncio.Lock()
+
+    async def _connect(self):
+        async with self._connect_lock:
+            if self._writer is not None and not self._writer.is_closing():
+                return
+            try:
+                reader, self._writer = await asyncio.open_unix_connection(self.path)
+            except OSError as e:
+                raise IPCError(f"Bot is unavailable: {e}", status=503)
+            self._reader_task = asyncio.create_task(self._read_replies(reader))
+
+    async def _read_replies(self, reader: asyncio.StreamReader):
+        try:
+            while line := await reader.readline():
+                reply = json.loads(line)
+                future = self._pending.pop(reply.get("id"), None)
+                if future is not None and not future.done():
+                    future.set_result(reply)
+        finally:
+            self._writer = None
+            # Fail whatever was in flight on the lost connection
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(IPCError("Bot connection lost", status=503))
+            self._pending.clear()
+
+    async def request(self, op: str, **args) -> Any:
+        await self._connect()
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+
+        self._writer.write(json.dumps({"id": request_id, "op": op, "args": args}).encode() + b"\n")
+        try:
+            await self._writer.drain()
+            reply = await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            raise IPCError(f"Bot did not answer {op!r} in time", status=504)
+        except ConnectionError as e:
+            raise IPCError(f"Bot connection lost: {e}", status=503)
+        finally:
+            self._pending.pop(request_id, None)
+
+        if not reply["ok"]:
+            raise IPCError(reply.get("error", "Request failed"), status=reply.get("status", 500))
+        return reply["result"]
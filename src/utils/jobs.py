@@ -0,0 +1,136 @@
+import difflib
+import json
+import logging
+import os
+import time
+from bisect import bisect_left
+from itertools import takewhile
+from pathlib import Path
+
+import pyvolt
+
+logger = logging.getLogger("toko")
+
+class Job:
+    __slots__ = ("name", "min_income", "max_income", "rarity", "success_chance")
+
+    def __init__(self, name: str, min_income: int, max_income: int, rarity: str, success_chance: float):
+        self.name = name
+        self.min_income = min_income
+        self.max_income = max_income
+        self.rarity = rarity
+        self.success_chance = success_chance
+
+class JobCatalog:
+    """The jobs in data/jobs.json, indexed for lookup and pre-rendered for `.jobs`.
+
+    Names are matched case-insensitively, then by unique prefix, then fuzzily,
+    so `.job barist` finds "Barista". An ambiguous prefix is never guessed at;
+    `matches()` returns its candidates so the user can pick one. The file is re-read when its mtime
+    changes (checked at most every `check_interval` seconds); a broken file
+    keeps the previous catalog.
+    """
+
+    def __init__(self, path: Path, rarity_weights: dict[str, int], coin_emoji: str,
+                 per_page: int = 5, check_interval: float = 5.0):
+        self.path = path
+        self.rarity_weights = rarity_weights
+        self.coin_emoji = coin_emoji
+        self.per_page = per_page
+        self.check_interval = check_interval
+
+        self.jobs: list[Job] = []
+        self._by_name: dict[str, Job] = {}
+        self._sorted_names: list[str] = []
+        self._pages: list[pyvolt.SendableEmbed] = []
+        self._mtime = 0.0
+        self._checked_at = 0.0
+        self.reload()
+
+    # === Loading ===
+
+    def reload(self) -> bool:
+        """Rebuild the catalog from disk. Returns False (keeping the old one) on a bad file."""
+        try:
+            mtime = os.stat(self.path).st_mtime
+            with open(self.path, "r") as f:
+                raw = json.load(f)
+            jobs = [
+                Job(
+                    name=entry["name"],
+                    min_income=entry["min_income"],
+                    max_income=entry["max_income"],
+                    rarity=entry["rarity"],
+                    success_chance=min(1.0, self.rarity_weights.get(entry["rarity"], 1) / 10),
+                )
+                for entry in raw
+            ]
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Failed to load jobs from {self.path}: {e}")
+            return False
+
+        self.jobs = jobs
+        self._by_name = {job.name.casefold(): job for job in jobs}
+        self._sorted_names = sorted(self._by_name)
+        self._pages = self._render_pages()
+        self._mtime = mtime
+        logger.info(f"Loaded {len(jobs)} jobs")
+        return True
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+        try:
+            if os.stat(self.path).st_mtime != self._mtime:
+                self.reload()
+        except OSError:
+            pass
+
+    def _render_pages(self) -> list[pyvolt.SendableEmbed]:
+        chunks = [self.jobs[i:i + self.per_page] for i in range(0, len(self.jobs), self.per_page)] or [[]]
+        return [
+            pyvolt.SendableEmbed(
+                title=f"📋 Available Jobs (Page {index + 1}/{len(chunks)})",
+                description="\n".join(
+                    f"**{job.name}** — Income: {self.coin_emoji} `{job.min_income} - {job.max_income}` | Rarity: `{job.rarity}`"
+                    for job in chunk
+                ),
+                color="#98C9FF"
+            )
+            for index, chunk in enumerate(chunks)
+        ]
+
+    # === Lookup ===
+
+    @property
+    def pages(self) -> list[pyvolt.SendableEmbed]:
+        self._maybe_reload()
+        return self._pages
+
+    def matches(self, query: str) -> list[Job]:
+        """Jobs `query` could mean: one for an exact name, unique prefix or close
+        typo; every completion, sorted by name, for an ambiguous prefix; else none."""
+        self._maybe_reload()
+        key = query.strip().casefold()
+        if not key:
+            return []
+
+        job = self._by_name.get(key)
+        if job is not None:
+            return [job]
+
+        start = bisect_left(self._sorted_names, key)
+        prefixed = list(takewhile(lambda name: name.startswith(key), self._sorted_names[start:]))
+        if prefixed:
+            return [self._by_name[name] for name in prefixed]
+
+        # No name starts with it: assume a typo
+        close = difflib.get_close_matches(key, self._sorted_names, n=1, cutoff=0.6)
+        return [self._by_name[close[0]]] if close else []
+
+    def find(self, query: str) -> Job | None:
+        """Resolve a job by exact name, unique prefix or close typo; None if unknown or ambiguous."""
+        matches = self.matches(query)
+        return matches[0] if len(matches) == 1 else None
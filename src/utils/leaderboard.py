@@ -0,0 +1,198 @@
+import asyncio
+from bisect import bisect_left, insort
+from typing import AsyncIterator, Callable
+
+from utils.cache import TTLCache
+
+class RankIndex:
+    """Order-statistic index of members by score, highest first.
+
+    Entries are kept in sorted buckets of at most 2 * load items, with a
+    Fenwick tree over the bucket sizes, so updates, rank lookups and seeking to
+    an offset all cost O(log n).
+    """
+
+    def __init__(self, load: int = 256):
+        self._load = load
+        self._scores: dict[str, int] = {}
+        self._buckets: list[list[tuple[int, str]]] = []
+        self._maxes: list[tuple[int, str]] = []
+        self._tree: list[int] = [0]
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def __contains__(self, member: str) -> bool:
+        return member in self._scores
+
+    def score(self, member: str) -> int | None:
+        return self._scores.get(member)
+
+    # === Fenwick tree over bucket sizes ===
+
+    def _rebuild_tree(self):
+        tree = [0] * (len(self._buckets) + 1)
+        for i, bucket in enumerate(self._buckets, start=1):
+            tree[i] += len(bucket)
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def _tree_add(self, index: int, delta: int):
+        i = index + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def _tree_prefix(self, index: int) -> int:
+        """Number of entries in buckets before `index`."""
+        total, i = 0, index
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def _tree_seek(self, offset: int) -> tuple[int, int]:
+        """Return (bucket index, position in bucket) of the entry at `offset`."""
+        pos, remaining = 0, offset
+        step = 1 << (len(self._tree) - 1).bit_length()
+        while step:
+            nxt = pos + step
+            if nxt < len(self._tree) and self._tree[nxt] <= remaining:
+                pos = nxt
+                remaining -= self._tree[nxt]
+            step >>= 1
+        return pos, remaining
+
+    # === Mutation ===
+
+    def update(self, member: str, score: int):
+        """Insert a member or move them to a new score."""
+        old = self._scores.get(member)
+        if old == score:
+            return
+        if old is not None:
+            self._remove_key((-old, member))
+        self._scores[member] = score
+        self._insert_key((-score, member))
+
+    def remove(self, member: str):
+        old = self._scores.pop(member, None)
+        if old is not None:
+            self._remove_key((-old, member))
+
+    def _insert_key(self, key: tuple[int, str]):
+        if not self._buckets:
+            self._buckets.append([key])
+            self._maxes.append(key)
+            self._rebuild_tree()
+            return
+
+        i = bisect_left(self._maxes, key)
+        if i == len(self._maxes):
+            i -= 1
+        bucket = self._buckets[i]
+        insort(bucket, key)
+        self._maxes[i] = bucket[-1]
+
+        if len(bucket) > 2 * self._load:
+            self._buckets[i:i + 1] = [bucket[:self._load], bucket[self._load:]]
+            self._maxes[i:i + 1] = [bucket[self._load - 1], bucket[-1]]
+            self._rebuild_tree()
+        else:
+            self._tree_add(i, 1)
+
+    def _remove_key(self, key: tuple[int, str]):
+        i = bisect_left(self._maxes, key)
+        bucket = self._buckets[i]
+        del bucket[bisect_left(bucket, key)]
+
+        if bucket:
+            self._maxes[i] = bucket[-1]
+            self._tree_add(i, -1)
+        else:
+            del self._buckets[i]
+            del self._maxes[i]
+            self._rebuild_tree()
+
+    # === Queries ===
+
+    def rank(self, member: str) -> int | None:
+        """1-based position of a member, or None if they aren't ranked."""
+        score = self._scores.get(member)
+        if score is None:
+            return None
+        key = (-score, member)
+        i = bisect_left(self._maxes, key)
+        return self._tree_prefix(i) + bisect_left(self._buckets[i], key) + 1
+
+    def top(self, offset: int = 0, limit: int = 10) -> list[tuple[str, int]]:
+        """Return up to `limit` (member, score) pairs starting at 0-based `offset`."""
+        if offset >= len(self._scores) or limit <= 0:
+            return []
+        i, j = self._tree_seek(offset)
+        entries = []
+        while i < len(self._buckets) and len(entries) < limit:
+            for neg_score, member in self._buckets[i][j:j + limit - len(entries)]:
+                entries.append((member, -neg_score))
+            i, j = i + 1, 0
+        return entries
+
+class Leaderboard:
+    """Per-server wealth rankings kept in memory and updated on every economy write.
+
+    A server is loaded from Mongo the first time it is queried and reloaded after
+    `reload_after` seconds to pick up writes made by other processes. At most
+    `max_servers` servers are kept, least recently used dropped first.
+    """
+
+    def __init__(self, loader: Callable[[str], AsyncIterator[tuple[str, int]]], reload_after: float = 600,
+                 max_servers: int = 1000):
+        self._loader = loader
+        self.reload_after = reload_after
+        self._indexes = TTLCache(maxsize=max_servers, ttl=reload_after)
+        self._loading: dict[str, asyncio.Future] = {}
+        # Writes that happen while a server is being loaded, replayed once it is
+        self._backlog: dict[str, dict[str, int]] = {}
+
+    def record(self, server_id: str, user_id: str, wealth: int):
+        """Apply a member's new total wealth if their server is loaded."""
+        backlog = self._backlog.get(server_id)
+        if backlog is not None:
+            backlog[user_id] = wealth
+        index = self._indexes.get(server_id)
+        if index is not None:
+            index.update(user_id, wealth)
+
+    async def get(self, server_id: str) -> RankIndex:
+        index = self._indexes.get(server_id)
+        if index is not None:
+            return index
+
+        # Concurrent commands on a cold server share one load
+        pending = self._loading.get(server_id)
+        if pending is None:
+            pending = asyncio.ensure_future(self._load(server_id))
+            self._loading[server_id] = pending
+            pending.add_done_callback(lambda _: self._loading.pop(server_id, None))
+        return await asyncio.shield(pending)
+
+    async def _load(self, server_id: str) -> RankIndex:
+        index = RankIndex()
+        backlog = self._backlog.setdefault(server_id, {})
+        try:
+            async for user_id, wealth in self._loader(server_id):
+                index.update(user_id, wealth)
+        finally:
+            del self._backlog[server_id]
+        for user_id, wealth in backlog.items():
+            index.update(user_id, wealth)
+        self._indexes.set(server_id, index)
+        return index
+
+    def forget(self, server_id: str):
+        self._indexes.pop(server_id)
+
+    def stats(self) -> dict:
+        return {"servers": len(self._indexes), "hits": self._indexes.hits, "misses": self._indexes.misses}
@@ -0,0 +1,114 @@
+import asyncio
+import time
+from collections import deque
+from typing import Callable
+
+import pyvolt
+from utils.cache import TTLCache
+
+class _Burst:
+    __slots__ = ("channel_id", "title", "color", "entries", "count", "started", "last_seen")
+
+    def __init__(self, channel_id: str, title: str, color: str, now: float):
+        self.channel_id = channel_id
+        self.title = title
+        self.color = color
+        self.entries: list[str] = []
+        self.count = 0
+        self.started = now
+        self.last_seen = now
+
+class BurstCoalescer:
+    """Collapses floods of one log event in one server into summary embeds.
+
+    Up to `threshold` events per `window` seconds are delivered as usual. Past
+    that, further events of the same server and type are only counted (and the
+    first `max_listed` remembered) until the burst has been quiet for `window`
+    seconds, or `max_hold` seconds have passed, and are then sent as one
+    summary listing the affected ids and names.
+    """
+
+    def __init__(self, deliver: Callable[[str, pyvolt.SendableEmbed], None], threshold: int = 5,
+                 window: float = 2.0, max_hold: float = 10.0, max_listed: int = 25):
+        self.deliver = deliver
+        self.threshold = threshold
+        self.window = window
+        self.max_hold = max_hold
+        self.max_listed = max_listed
+
+        # (server id, event) -> timestamps of the latest events, at most threshold + 1
+        self._recent = TTLCache(maxsize=100_000, ttl=window)
+        self._bursts: dict[tuple[str, int], _Burst] = {}
+        self._flushers: dict[tuple[str, int], asyncio.Task] = {}
+        self.coalesced = 0
+        self.summaries = 0
+
+    def add(self, server_id: str, event: int, channel_id: str, embed: pyvolt.SendableEmbed,
+            entry: str, summary_title: str, color: str = "#e74c3c"):
+        """Deliver `embed`, or fold `entry` into the summary if the server is in a burst."""
+        key = (server_id, event)
+        now = time.monotonic()
+
+        burst = self._bursts.get(key)
+        if burst is None:
+            recent = self._recent.get(key)
+            if recent is None:
+                recent = deque(maxlen=self.threshold + 1)
+            recent.append(now)
+            # Re-set on every event so the TTL tracks the latest one
+            self._recent.set(key, recent)
+            if len(recent) <= self.threshold or now - recent[0] > self.window:
+                self.deliver(channel_id, embed)
+                return
+
+            burst = self._bursts[key] = _Burst(channel_id, summary_title, color, now)
+            self._flushers[key] = asyncio.get_running_loop().create_task(self._flush_when_quiet(key))
+
+        burst.count += 1
+        burst.last_seen = now
+        if len(burst.entries) < self.max_listed:
+            burst.entries.append(entry)
+        self.coalesced += 1
+
+    async def _flush_when_quiet(self, key: tuple[str, int]):
+        try:
+            while True:
+                await asyncio.sleep(self.window)
+                burst = self._bursts[key]
+                now = time.monotonic()
+                if now - burst.last_seen >= self.window:
+                    self._bursts.pop(key)
+                    self._recent.pop(key)
+                    self._send_summary(burst)
+                    return
+                if now - burst.started >= self.max_hold:
+                    # Still going: report what we have and keep collecting
+                    self._bursts[key] = _Burst(burst.channel_id, burst.title, burst.color, now)
+                    self._send_summary(burst)
+        finally:
+            self._flushers.pop(key, None)
+
+    def _send_summary(self, burst: _Burst):
+        # A burst rolled over at max_hold that saw nothing since
+        if not burst.count:
+            return
+        lines = list(burst.entries)
+        if burst.count > len(lines):
+            lines.append(f"…and {burst.count - len(lines)} more")
+        self.deliver(burst.channel_id, pyvolt.SendableEmbed(
+            title=f"{burst.title} ({burst.count} in a burst)",
+            description="\n".join(lines),
+            color=burst.color
+        ))
+        self.summaries += 1
+
+    async def close(self):
+        """Send whatever is still being held."""
+        for task in list(self._flushers.values()):
+            task.cancel()
+        for burst in self._bursts.values():
+            self._send_summary(burst)
+        self._bursts.clear()
+
+    def stats(self) -> dict:
+        return {"active_bursts": len(self._bursts), "coalesced": self.coalesced, "summaries": self.summaries}
@@ -0,0 +1,95 @@
+import os
+from pymongo import ReturnDocument
+from models.ServerLogging import ServerLogging
+from utils.cache import TTLCache
+
+# One bit per log type, grouped like models.ServerLogging.Logs
+MEMBER_BAN = 1 << 0
+MEMBER_UNBAN = 1 << 1
+MEMBER_KICK = 1 << 2
+MESSAGE_DELETE = 1 << 3
+MESSAGE_EDIT = 1 << 4
+ROLE_CREATE = 1 << 5
+ROLE_DELETE = 1 << 6
+ROLE_UPDATE = 1 << 7
+CHANNEL_CREATE = 1 << 8
+CHANNEL_DELETE = 1 << 9
+CHANNEL_UPDATE = 1 << 10
+
+LOG_EVENTS = {
+    MEMBER_BAN: ("moderation_logs", "member_ban"),
+    MEMBER_UNBAN: ("moderation_logs", "member_unban"),
+    MEMBER_KICK: ("moderation_logs", "member_kick"),
+    MESSAGE_DELETE: ("message_logs", "message_delete"),
+    MESSAGE_EDIT: ("message_logs", "message_edit"),
+    ROLE_CREATE: ("role_logs", "role_create"),
+    ROLE_DELETE: ("role_logs", "role_delete"),
+    ROLE_UPDATE: ("role_logs", "role_update"),
+    CHANNEL_CREATE: ("channel_logs", "channel_create"),
+    CHANNEL_DELETE: ("channel_logs", "channel_delete"),
+    CHANNEL_UPDATE: ("channel_logs", "channel_update"),
+}
+
+class ServerLogSettings:
+    """Flattened logging config of one server.
+
+    `mask` has a bit set for every log type that is enabled and has a channel.
+    """
+    __slots__ = ("mask", "channels")
+
+    def __init__(self, mask: int = 0, channels: dict[int, str] | None = None):
+        self.mask = mask
+        self.channels = channels or {}
+
+    @classmethod
+    def from_document(cls, doc: dict | None) -> "ServerLogSettings":
+        logs = (doc or {}).get("logs") or {}
+        mask, channels = 0, {}
+        for bit, (category, log_type) in LOG_EVENTS.items():
+            config = (logs.get(category) or {}).get(log_type) or {}
+            if config.get("enabled") and config.get("channel_id"):
+                mask |= bit
+                channels[bit] = config["channel_id"]
+        return cls(mask, channels)
+
+    def channel_for(self, event: int) -> str | None:
+        """Return the channel to log `event` to, or None if it isn't logged."""
+        if not self.mask & event:
+            return None
+        return self.channels[event]
+
+_settings = TTLCache(
+    maxsize=int(os.getenv("LOG_CONFIG_CACHE_SIZE", "50000")),
+    ttl=float(os.getenv("LOG_CONFIG_CACHE_TTL", "300")),
+)
+
+def cached_log_settings(server_id: str) -> ServerLogSettings | None:
+    """Return a server's settings if cached. Never touches the database."""
+    return _settings.get(server_id)
+
+async def load_log_settings(server_id: str, server_name: str) -> ServerLogSettings:
+    """Load (creating if missing) a server's logging config in one query and cache it."""
+    doc = await ServerLogging.get_motor_collection().find_one_and_update(
+        {"_id": server_id},
+        {"$setOnInsert": {"name": server_name}},
+        projection={"logs": 1},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    settings = ServerLogSettings.from_document(doc)
+    _settings.set(server_id, settings)
+    return settings
+
+async def read_log_settings(server_id: str) -> ServerLogSettings:
+    """Like load_log_settings, but never writes: a server without a config gets none enabled.
+
+    For hot paths such as every chat message, where an upsert would create a
+    config for every server the bot is in.
+    """
+    doc = await ServerLogging.get_motor_collection().find_one({"_id": server_id}, {"logs": 1})
+    settings = ServerLogSettings.from_document(doc)
+    _settings.set(server_id, settings)
+    return settings
+
+def invalidate_log_settings(server_id: str):
+    _settings.pop(server_id)
@@ -0,0 +1,122 @@
+import asyncio
+import logging
+import time
+from collections import deque
+
+import pyvolt
+from utils.cache import TTLCache
+
+logger = logging.getLogger("toko")
+
+# Revolt accepts at most this many embeds on one message
+MAX_EMBEDS_PER_MESSAGE = 10
+
+class LogDelivery:
+    """Per-channel send queues for log embeds.
+
+    Embeds queued for the same channel within `linger` seconds are packed into
+    one message (up to MAX_EMBEDS_PER_MESSAGE). Channel objects are cached so a
+    log entry costs no extra fetch, 429 responses back off and retry, and each
+    queue is capped at `max_queue` embeds, dropping the oldest when full.
+    """
+
+    def __init__(self, bot, max_queue: int = 500, linger: float = 0.5, max_retries: int = 5):
+        self.bot = bot
+        self.max_queue = max_queue
+        self.linger = linger
+        self.max_retries = max_retries
+
+        self._queues: dict[str, deque[pyvolt.SendableEmbed]] = {}
+        self._workers: dict[str, asyncio.Task] = {}
+        self._channels = TTLCache(maxsize=10_000, ttl=3600)
+
+        self.queued = 0
+        self.dropped = 0
+        self.failed = 0
+        self.rate_limited = 0
+        self.sent_messages = 0
+        self.sent_embeds = 0
+        self.last_send_ms = 0.0
+        self.total_send_ms = 0.0
+
+    def enqueue(self, channel_id: str, embed: pyvolt.SendableEmbed):
+        """Queue an embed for a channel. Never blocks."""
+        queue = self._queues.setdefault(channel_id, deque())
+        if len(queue) >= self.max_queue:
+            queue.popleft()
+            self.dropped += 1
+        queue.append(embed)
+        self.queued += 1
+
+        worker = self._workers.get(channel_id)
+        if worker is None or worker.done():
+            self._workers[channel_id] = asyncio.get_running_loop().create_task(self._drain(channel_id))
+
+    async def _drain(self, channel_id: str):
+        queue = self._queues[channel_id]
+        try:
+            while queue:
+                if len(queue) < MAX_EMBEDS_PER_MESSAGE:
+                    # Give a burst a moment to fill the message
+                    await asyncio.sleep(self.linger)
+                batch = [queue.popleft() for _ in range(min(len(queue), MAX_EMBEDS_PER_MESSAGE))]
+                await self._send(channel_id, batch)
+        finally:
+            if not queue:
+                self._queues.pop(channel_id, None)
+            self._workers.pop(channel_id, None)
+
+    async def _get_channel(self, channel_id: str):
+        channel = self._channels.get(channel_id)
+        if channel is None:
+            channel = await self.bot.fetch_channel(channel_id)
+            self._channels.set(channel_id, channel)
+        return channel
+
+    async def _send(self, channel_id: str, batch: list[pyvolt.SendableEmbed]):
+        delay = 1.0
+        for _ in range(self.max_retries):
+            try:
+                channel = await self._get_channel(channel_id)
+                start = time.perf_counter()
+                await channel.send(embeds=batch)
+            except Exception as e:
+                retry_after = getattr(e, "retry_after", None)
+                if getattr(e, "status", None) != 429 and retry_after is None:
+                    # Missing channel or permissions: retrying won't help
+                    self._channels.pop(channel_id)
+                    self.failed += len(batch)
+                    logger.warning(f"Failed to deliver {len(batch)} log embed(s) to {channel_id}: {e}")
+                    return
+                self.rate_limited += 1
+                await asyncio.sleep(retry_after or delay)
+                delay = min(delay * 2, 30.0)
+            else:
+                self.last_send_ms = (time.perf_counter() - start) * 1000
+                self.total_send_ms += self.last_send_ms
+                self.sent_messages += 1
+                self.sent_embeds += len(batch)
+                return
+
+        self.dropped += len(batch)
+        logger.warning(f"Dropped {len(batch)} log embed(s) for {channel_id} after repeated rate limits")
+
+    async def close(self, timeout: float = 10.0):
+        """Wait up to `timeout` seconds for queued embeds to be sent."""
+        workers = [w for w in self._workers.values() if not w.done()]
+        if workers:
+            await asyncio.wait(workers, timeout=timeout)
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": sum(len(q) for q in self._queues.values()),
+            "active_channels": len(self._workers),
+            "queued": self.queued,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "rate_limited": self.rate_limited,
+            "sent_messages": self.sent_messages,
+            "sent_embeds": self.sent_embeds,
+            "last_send_ms": round(self.last_send_ms, 2),
+            "avg_send_ms": round(self.total_send_ms / self.sent_messages, 2) if self.sent_messages else 0.0,
+        }
@@ -0,0 +1,75 @@
+from datetime import datetime, timezone
+
+from pymongo import UpdateOne
+from models.Membership import Membership
+
+# Members written per bulk_write during a full server sync
+SYNC_BATCH_SIZE = 1000
+
+def _collection():
+    return Membership.get_motor_collection()
+
+def server_details(server) -> dict:
+    return {
+        "server_name": server.name,
+        "server_icon": server.icon.url() if server.icon else None,
+    }
+
+def sync_stamp() -> datetime:
+    """Take before fetching a server's members and pass to sync_server."""
+    return datetime.now(timezone.utc)
+
+async def add_member(server, user_id: str):
+    # Stamped so a sync that started earlier doesn't delete this member
+    await _collection().update_one(
+        {"user_id": user_id, "server_id": server.id},
+        {"$set": {**server_details(server), "synced_at": datetime.now(timezone.utc)}},
+        upsert=True,
+    )
+
+async def remove_member(server_id: str, user_id: str):
+    await _collection().delete_one({"user_id": user_id, "server_id": server_id})
+
+async def update_server(server):
+    """Refresh the denormalized name/icon on every membership of a server."""
+    await _collection().update_many({"server_id": server.id}, {"$set": server_details(server)})
+
+async def remove_server(server_id: str):
+    await _collection().delete_many({"server_id": server_id})
+
+async def sync_server(server, member_ids, stamp: datetime):
+    """Make a server's memberships match `member_ids`, fetched after `stamp` was taken.
+
+    Upserts every member with the sync stamp, then deletes whatever kept an
+    older one, so members who left while the bot was offline are dropped.
+    Joins seen after `stamp` carry a newer stamp (see add_member) and are kept.
+    """
+    details = {**server_details(server), "synced_at": stamp}
+    batch = []
+    for user_id in member_ids:
+        batch.append(UpdateOne({"user_id": user_id, "server_id": server.id}, {"$set": details}, upsert=True))
+        if len(batch) >= SYNC_BATCH_SIZE:
+            await _collection().bulk_write(batch, ordered=False)
+            batch = []
+    if batch:
+        await _collection().bulk_write(batch, ordered=False)
+
+    # synced_at None: written before add_member stamped memberships
+    await _collection().delete_many({
+        "server_id": server.id,
+        "$or": [{"synced_at": {"$lt": stamp}}, {"synced_at": None}],
+    })
+
+async def list_user_servers(user_id: str, after: str | None = None, limit: int = 50) -> tuple[list[dict], str | None]:
+    """Return one page of a user's servers ordered by id, and the cursor for the next page."""
+    query = {"user_id": user_id}
+    if after:
+        query["server_id"] = {"$gt": after}
+
+    cursor = _collection().find(
+        query, {"_id": 0, "server_id": 1, "server_name": 1, "server_icon": 1}
+    ).sort("server_id", 1).limit(limit + 1)
+    docs = await cursor.to_list(length=limit + 1)
+
+    next_cursor = docs[limit - 1]["server_id"] if len(docs) > limit else None
+    return docs[:limit], next_cursor
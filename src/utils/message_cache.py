@@ -0,0 +1,144 @@
+import time
+from collections import OrderedDict
+
+# Rough per-record cost of the object, its slots and the dict entries pointing at it
+RECORD_OVERHEAD = 320
+
+class CachedMessage:
+    __slots__ = ("id", "server_id", "channel_id", "author_id", "content", "attachments", "created_at", "size")
+
+    def __init__(self, id: str, server_id: str, channel_id: str, author_id: str,
+                 content: str, attachments: tuple[tuple[str, str], ...]):
+        self.id = id
+        self.server_id = server_id
+        self.channel_id = channel_id
+        self.author_id = author_id
+        self.content = content
+        # (filename, url) pairs
+        self.attachments = attachments
+        self.created_at = time.monotonic()
+        self.size = RECORD_OVERHEAD + len(content) + sum(len(name) + len(url) for name, url in attachments)
+
+class MessageCache:
+    """Recent message contents of servers that log deletes/edits.
+
+    Bounded by a global byte budget and a per-server one (so one busy server
+    can't push everyone else out), evicting least recently stored first, and
+    by `max_age` seconds. Sizes are estimates from string lengths.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, server_max_bytes: int = 4 * 1024 * 1024,
+                 max_age: float = 6 * 3600):
+        self.max_bytes = max_bytes
+        self.server_max_bytes = server_max_bytes
+        self.max_age = max_age
+
+        self._messages: OrderedDict[str, CachedMessage] = OrderedDict()
+        self._servers: dict[str, OrderedDict[str, CachedMessage]] = {}
+        self._server_bytes: dict[str, int] = {}
+        self.bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    def put(self, record: CachedMessage):
+        self._remove(record.id)
+        if record.size > self.server_max_bytes:
+            return
+
+        self._messages[record.id] = record
+        self._servers.setdefault(record.server_id, OrderedDict())[record.id] = record
+        self._server_bytes[record.server_id] = self._server_bytes.get(record.server_id, 0) + record.size
+        self.bytes += record.size
+
+        server = self._servers[record.server_id]
+        while self._server_bytes[record.server_id] > self.server_max_bytes:
+            self._evict(next(iter(server)))
+        while self.bytes > self.max_bytes:
+            self._evict(next(iter(self._messages)))
+        self._expire()
+
+    def get(self, message_id: str) -> CachedMessage | None:
+        record = self._messages.get(message_id)
+        if record is None or time.monotonic() - record.created_at > self.max_age:
+            if record is not None:
+                self._evict(message_id)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return record
+
+    def pop(self, message_id: str) -> CachedMessage | None:
+        record = self.get(message_id)
+        if record is not None:
+            self._remove(message_id)
+        return record
+
+    def update_content(self, message_id: str, content: str):
+        """Replace a record's content in place, keeping its age and eviction order."""
+        record = self._messages.get(message_id)
+        if record is None:
+            return
+        delta = len(content) - len(record.content)
+        record.content = content
+        record.size += delta
+        self._server_bytes[record.server_id] += delta
+        self.bytes += delta
+
+        server = self._servers[record.server_id]
+        while self._server_bytes[record.server_id] > self.server_max_bytes and server:
+            self._evict(next(iter(server)))
+        while self.bytes > self.max_bytes:
+            self._evict(next(iter(self._messages)))
+
+    def forget_server(self, server_id: str):
+        for message_id in list(self._servers.get(server_id, ())):
+            self._remove(message_id)
+
+    def clear(self):
+        self._messages.clear()
+        self._servers.clear()
+        self._server_bytes.clear()
+        self.bytes = 0
+
+    def _expire(self):
+        # Records are stored in time order, so expired ones are at the front
+        cutoff = time.monotonic() - self.max_age
+        while self._messages:
+            oldest = next(iter(self._messages.values()))
+            if oldest.created_at >= cutoff:
+                break
+            self._evict(oldest.id)
+
+    def _evict(self, message_id: str):
+        if self._remove(message_id):
+            self.evictions += 1
+
+    def _remove(self, message_id: str) -> bool:
+        record = self._messages.pop(message_id, None)
+        if record is None:
+            return False
+        server = self._servers[record.server_id]
+        del server[message_id]
+        self._server_bytes[record.server_id] -= record.size
+        if not server:
+            del self._servers[record.server_id]
+            del self._server_bytes[record.server_id]
+        self.bytes -= record.size
+        return True
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "messages": len(self._messages),
+            "servers": len(self._servers),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
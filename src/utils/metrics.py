@@ -0,0 +1,205 @@
+import asyncio
+import functools
+import logging
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable
+
+logger = logging.getLogger("toko")
+
+# Seconds; covers a cached reply (~1ms) up to a slow multi-query command
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(names: tuple[str, ...], values: tuple, extra: dict | None = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{value}"' for name, value in (extra or {}).items()]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        # Updated from pymongo's monitor threads as well as the event loop
+        self._lock = threading.Lock()
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        super().__init__(name, help, labels)
+        self.values: dict[tuple, float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1.0):
+        with self._lock:
+            self.values[label_values] = self.values.get(label_values, 0.0) + amount
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = list(self.values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labels, key)} {value}" for key, value in values
+        ]
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *label_values: str, amount: float = 1.0):
+        self.inc(*label_values, amount=-amount)
+
+    def set(self, *label_values: str, value: float):
+        with self._lock:
+            self.values[label_values] = value
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram. observe() is a bisect and two additions under a lock."""
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = (), buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = buckets
+        # label values -> [per-bucket counts (+Inf last), sum]
+        self.values: dict[tuple, list] = {}
+
+    def observe(self, *label_values: str, value: float):
+        bucket = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self.values.get(label_values)
+            if entry is None:
+                entry = self.values[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][bucket] += 1
+            entry[1] += value
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = [(key, list(counts), total) for key, (counts, total) in self.values.items()]
+        lines = self.header()
+        for key, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, {'le': le})} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self.metrics: dict[str, _Metric] = {}
+        # prefix -> callable returning {name: number}, sampled at scrape time
+        self.collectors: dict[str, Callable[[], dict]] = {}
+        self._lock = threading.Lock()
+
+    def _add(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            return self.metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help: str, labels: tuple[str, ...] = ()) -> Counter:
+        return self._add(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: tuple[str, ...] = ()) -> Gauge:
+        return self._add(Gauge(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: tuple[str, ...] = (), buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, labels, buckets))
+
+    def register_stats(self, prefix: str, stats: Callable[[], dict]):
+        """Expose the numeric values of a `stats()` dict as `<prefix>_<key>` gauges."""
+        with self._lock:
+            self.collectors[prefix] = stats
+
+    def render(self) -> str:
+        with self._lock:
+            metrics, collectors = list(self.metrics.values()), list(self.collectors.items())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for prefix, stats in collectors:
+            try:
+                values = stats()
+            except Exception as e:
+                logger.warning(f"Metrics collector {prefix} failed: {e}")
+                continue
+            for key, value in values.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    lines.append(f"# TYPE {prefix}_{key} gauge")
+                    lines.append(f"{prefix}_{key} {value}")
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+command_total = registry.counter("toko_commands_total", "Commands invoked", ("command",))
+command_errors = registry.counter("toko_command_errors_total", "Commands that raised or failed", ("command",))
+command_in_flight = registry.gauge("toko_commands_in_flight", "Commands currently running", ("command",))
+command_duration = registry.histogram("toko_command_duration_seconds", "Command latency", ("command",))
+command_queries = registry.histogram(
+    "toko_command_queries", "MongoDB commands issued per bot command", ("command",), buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50))
+
+gateway_events = registry.counter("toko_gateway_events_total", "Gateway events dispatched to this process", ("event",))
+
+listener_total = registry.counter("toko_listener_calls_total", "Listener invocations", ("listener",))
+listener_errors = registry.counter("toko_listener_errors_total", "Listener invocations that raised", ("listener",))
+listener_in_flight = registry.gauge("toko_listeners_in_flight", "Listener invocations currently running", ("listener",))
+listener_duration = registry.histogram("toko_listener_duration_seconds", "Listener latency", ("listener",))
+
+def instrumented_listener(func):
+    """Record count, errors, in-flight and latency of a Gear listener.
+
+    Goes below `@commands.Gear.listener()`; the wrapper keeps the function's
+    name, which is what the listener is registered under.
+    """
+    label = f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        listener_total.inc(label)
+        listener_in_flight.inc(label)
+        start = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        except Exception:
+            listener_errors.inc(label)
+            raise
+        finally:
+            listener_duration.observe(label, value=time.perf_counter() - start)
+            listener_in_flight.dec(label)
+
+    return wrapper
+
+async def serve_metrics(port: int, host: str = "0.0.0.0") -> asyncio.AbstractServer:
+    """Serve `registry` as Prometheus text on http://host:port/metrics."""
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request_line.split()
+            if len(parts) >= 2 and parts[0] == b"GET" and parts[1].split(b"?")[0] == b"/metrics":
+                body = registry.render().encode()
+                status, content_type = "200 OK", "text/plain; version=0.0.4; charset=utf-8"
+            else:
+                body, status, content_type = b"Not found\n", "404 Not Found", "text/plain"
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    logger.info(f"Serving metrics on http://{host}:{port}/metrics")
+    return server
@@ -0,0 +1,162 @@
+import logging
+import os
+import re
+import threading
+
+from pymongo import monitoring
+from utils import metrics
+from utils.command_scope import current_scope
+
+logger = logging.getLogger("mongodb")
+
+# Handshakes and heartbeats, not queries
+IGNORED_COMMANDS = frozenset({"hello", "ismaster", "isMaster", "ping", "saslStart", "saslContinue", "endSessions", "buildInfo"})
+
+mongo_commands = metrics.registry.counter(
+    "toko_mongo_commands_total", "MongoDB commands by collection and operation", ("collection", "op"))
+mongo_failures = metrics.registry.counter(
+    "toko_mongo_command_failures_total", "MongoDB commands that failed", ("collection", "op"))
+mongo_duration = metrics.registry.histogram(
+    "toko_mongo_command_duration_seconds", "MongoDB command latency", ("collection", "op"))
+
+# Revolt ids (ULIDs) embedded in dotted paths such as "users.<id>.wallet"
+_ID_SEGMENT = re.compile(r"(?<![^.])[0-9A-Z]{26}(?![^.])")
+
+def filter_shape(query) -> object:
+    """`query` with every value (and ids in field paths) replaced by "?", keeping operators."""
+    if isinstance(query, dict):
+        return {_ID_SEGMENT.sub("<id>", key): filter_shape(value) for key, value in query.items()}
+    if isinstance(query, (list, tuple)):
+        return [filter_shape(value) for value in query[:1]] + (["..."] if len(query) > 1 else [])
+    return "?"
+
+def _command_filter(name: str, command) -> object:
+    if name in ("find", "count", "distinct"):
+        return command.get("filter", command.get("query"))
+    if name == "findAndModify":
+        return command.get("query")
+    if name in ("update", "delete"):
+        statements = command.get("updates" if name == "update" else "deletes") or []
+        return statements[0].get("q") if statements else None
+    if name == "aggregate":
+        pipeline = command.get("pipeline") or []
+        return pipeline[0].get("$match") if pipeline else None
+    return None
+
+class MongoCommandMonitor(monitoring.CommandListener):
+    """Counts and times every MongoDB command, logs slow ones and charges queries to the current command.
+
+    Motor runs the driver on executor threads but copies the caller's context,
+    so current_scope() here is the scope of the bot command that issued the query.
+    """
+
+    def __init__(self, slow_ms: float | None = None):
+        self.slow_ms = float(os.getenv("MONGO_SLOW_MS", "100")) if slow_ms is None else slow_ms
+        self._lock = threading.Lock()
+        # (connection, request id) -> (collection, op, command)
+        self._inflight: dict[tuple, tuple[str, str, object]] = {}
+
+    def started(self, event: monitoring.CommandStartedEvent):
+        if event.command_name in IGNORED_COMMANDS:
+            return
+        target = event.command.get(event.command_name)
+        collection = target if isinstance(target, str) else "-"
+        scope = current_scope()
+        with self._lock:
+            self._inflight[(event.connection_id, event.request_id)] = (collection, event.command_name, event.command)
+            # Concurrent queries of one command start on different driver threads
+            if scope is not None:
+                scope.queries += 1
+
+    def _finish(self, event, failed: bool):
+        with self._lock:
+            entry = self._inflight.pop((event.connection_id, event.request_id), None)
+            if entry is None:
+                return
+            collection, op, command = entry
+            seconds = event.duration_micros / 1_000_000
+            mongo_commands.inc(collection, op)
+            mongo_duration.observe(collection, op, value=seconds)
+            if failed:
+                mongo_failures.inc(collection, op)
+
+        if seconds * 1000 >= self.slow_ms:
+            logger.warning(
+                f"Slow query: {op} on {collection} took {seconds * 1000:.1f}ms, "
+                f"filter {filter_shape(_command_filter(op, command))}"
+            )
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent):
+        self._finish(event, failed=False)
+
+    def failed(self, event: monitoring.CommandFailedEvent):
+        self._finish(event, failed=True)
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """Tracks connections in use and how long checkouts wait for one, across all pools of a client."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checked_out = 0
+        self.total = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.checkout_failures = 0
+
+    def take_window(self) -> dict:
+        """Return the checkout-wait figures since the last call and reset them."""
+        with self._lock:
+            window = {
+                "checkouts": self.waits,
+                "avg_wait_ms": self.wait_seconds / self.waits * 1000 if self.waits else 0.0,
+                "max_wait_ms": self.max_wait_seconds * 1000,
+                "checkout_failures": self.checkout_failures,
+            }
+            self.waits = 0
+            self.wait_seconds = self.max_wait_seconds = 0.0
+            self.checkout_failures = 0
+        return window
+
+    def connection_checked_out(self, event):
+        # `duration` (seconds spent waiting for the checkout) is reported by pymongo >= 4.7
+        wait = getattr(event, "duration", 0.0) or 0.0
+        with self._lock:
+            self.checked_out += 1
+            self.waits += 1
+            self.wait_seconds += wait
+            self.max_wait_seconds = max(self.max_wait_seconds, wait)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.checkout_failures += 1
+
+    def connection_created(self, event):
+        with self._lock:
+            self.total += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.total -= 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
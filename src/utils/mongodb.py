@@ -1,24 +1,31 @@
 import os
 import time
+import asyncio
 import logging
-import pkgutil
-import importlib
+import importlib.util
 from motor.motor_asyncio import AsyncIOMotorClient
 from pymongo.errors import ConnectionFailure
-from beanie import init_beanie, Document
+from beanie import init_beanie
 from dotenv import load_dotenv
+from utils.startup import startup
+from utils.mongo_monitor import MongoCommandMonitor, PoolMonitor
+from utils import metrics
 
-# Dynamically import all models from the models package
+# Every Beanie document, registered explicitly. Add new models here.
 def get_beanie_models():
-    import models  # Make sure models/__init__.py exists
-    model_classes = []
-    for _, module_name, _ in pkgutil.iter_modules(models.__path__):
-        module = importlib.import_module(f"models.{module_name}")
-        for attr in dir(module):
-            obj = getattr(module, attr)
-            if isinstance(obj, type) and issubclass(obj, Document) and obj is not Document:
-                model_classes.append(obj)
-    return model_classes
+    from models.Cooldown import Cooldown
+    from models.LoginCode import LoginCode
+    from models.MemberEconomy import MemberEconomy
+    from models.Membership import Membership
+    from models.Prefix import Prefix
+    from models.RevokedToken import RevokedToken
+    from models.ServerEconomy import ServerEconomy
+    from models.ServerLogging import ServerLogging
+    from models.User import User
+    return [
+        Cooldown, LoginCode, MemberEconomy, Membership, Prefix,
+        RevokedToken, ServerEconomy, ServerLogging, User,
+    ]
 
 # === Terminal Styling ===
 
@@ -39,7 +46,11 @@ class Colour:
 logger = logging.getLogger("mongodb")
 logger.setLevel(logging.INFO)
 
-if not logger.handlers:
+def setup_logging():
+    """Attach the console and file handlers. Called on first connect, not at import."""
+    if logger.handlers:
+        return
+
     console = logging.StreamHandler()
 
     class MongoFormatter(logging.Formatter):
@@ -58,41 +69,161 @@ if not logger.handlers:
     console.setFormatter(formatter)
     logger.addHandler(console)
 
-    log_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "logs", "latest.log")
+    log_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "logs")
+    os.makedirs(log_dir, exist_ok=True)
+    log_path = os.path.join(log_dir, "latest.log")
     file_handler = logging.FileHandler(log_path, encoding="utf-8", mode="a")
     file_handler.setFormatter(logging.Formatter(fmt="%(asctime)s %(levelname)s %(name)s %(message)s", datefmt="%Y-%m-%d %H:%M:%S"))
     logger.addHandler(file_handler)
 
+# === Shared Client ===
+
+# Python packages the optional wire compressors need
+_COMPRESSOR_MODULES = {"zstd": "zstandard", "snappy": "snappy", "zlib": "zlib"}
+
+def client_options() -> dict:
+    """Motor client options from the environment. Unset variables keep the driver defaults."""
+    options = {
+        "maxPoolSize": int(os.getenv("MONGO_MAX_POOL_SIZE", "100")),
+        "minPoolSize": int(os.getenv("MONGO_MIN_POOL_SIZE", "0")),
+        "appname": os.getenv("MONGO_APP_NAME", "toko"),
+    }
+    for env, option in (
+        ("MONGO_MAX_IDLE_MS", "maxIdleTimeMS"),
+        ("MONGO_WAIT_QUEUE_TIMEOUT_MS", "waitQueueTimeoutMS"),
+        ("MONGO_CONNECT_TIMEOUT_MS", "connectTimeoutMS"),
+        ("MONGO_SERVER_SELECTION_TIMEOUT_MS", "serverSelectionTimeoutMS"),
+    ):
+        if os.getenv(env):
+            options[option] = int(os.getenv(env))
+
+    # e.g. "zstd,snappy,zlib"; compressors whose package isn't installed are skipped
+    compressors = [
+        name for name in (c.strip() for c in os.getenv("MONGO_COMPRESSORS", "").split(","))
+        if name in _COMPRESSOR_MODULES and importlib.util.find_spec(_COMPRESSOR_MODULES[name]) is not None
+    ]
+    if compressors:
+        options["compressors"] = ",".join(compressors)
+    if os.getenv("MONGO_READ_PREFERENCE"):
+        options["readPreference"] = os.getenv("MONGO_READ_PREFERENCE")
+    if os.getenv("MONGO_WRITE_CONCERN"):
+        w = os.getenv("MONGO_WRITE_CONCERN")
+        options["w"] = int(w) if w.isdigit() else w
+    return options
+
+# mongo URI -> (client, pool monitor); one client, and so one pool, per process
+_clients: dict[str, tuple[AsyncIOMotorClient, PoolMonitor]] = {}
+
+def get_client(uri: str | None = None) -> tuple[AsyncIOMotorClient, PoolMonitor]:
+    """Return the process-wide client for `uri` (default: mongoURI), building it on first use."""
+    load_dotenv()
+    uri = uri or os.getenv("mongoURI")
+    entry = _clients.get(uri)
+    if entry is None:
+        pool = PoolMonitor()
+        client = AsyncIOMotorClient(uri, event_listeners=[MongoCommandMonitor(), pool], **client_options())
+        entry = _clients[uri] = (client, pool)
+    return entry
+
 # === Async Beanie Database Wrapper ===
 
 class TokoDatabase:
     def __init__(self):
-        load_dotenv()
-        self._client = AsyncIOMotorClient(os.getenv("mongoURI"))
-        self._db = self._client["Toko"]
+        self._health_task: asyncio.Task | None = None
+        # Latest health_check() report, exported as toko_mongo_pool
+        self.health: dict = {}
+
+    @property
+    def client(self) -> AsyncIOMotorClient:
+        # Shared with every other TokoDatabase in the process
+        return get_client()[0]
+
+    @property
+    def pool(self) -> PoolMonitor:
+        return get_client()[1]
+
+    @property
+    def _db(self):
+        return self.client["Toko"]
 
     async def ping(self) -> float | None:
         try:
             start = time.time()
-            await self._client.admin.command("ping")
+            await self.client.admin.command("ping")
             return round((time.time() - start) * 1000, 2)
         except ConnectionFailure as e:
             logger.error(f"Failed to ping MongoDB:\n{e}")
             return None
 
     async def connect(self):
+        setup_logging()
         logger.info("Connecting to MongoDB...")
+        # Reports a bad URI or unreachable server at boot rather than at the first query
         ms = await self.ping()
         if ms is not None:
             logger.info(f"Connected to MongoDB. Ping: {ms}ms")
         else:
             logger.warning("Connection established, but ping failed.")
 
-        # Dynamically load all Beanie models from the models package
-        models = get_beanie_models()
-        await init_beanie(
-            database=self._db,
-            document_models=models
-        )
-
-db = TokoDatabase()
\ No newline at end of file
+        with startup.phase("init_beanie"):
+            await init_beanie(
+                database=self._db,
+                document_models=get_beanie_models()
+            )
+        logger.info("Initialised Beanie models.")
+
+        # The first check runs now, then every interval until close()
+        if self._health_task is None:
+            metrics.registry.register_stats("toko_mongo_pool", self.health_stats)
+            interval = float(os.getenv("MONGO_HEALTH_INTERVAL", "60"))
+            self._health_task = asyncio.get_running_loop().create_task(self.health_loop(interval))
+
+    async def health_check(self) -> dict:
+        """Ping the server and sample pool utilisation and checkout waits since the last check."""
+        try:
+            start = time.perf_counter()
+            await self.client.admin.command("ping")
+            ping_ms = round((time.perf_counter() - start) * 1000, 2)
+        except Exception as e:
+            # Not just driver errors: anything escaping here would end health_loop
+            logger.error(f"MongoDB health check failed: {e!r}")
+            ping_ms = None
+
+        pool = self.pool
+        max_pool = self.client.options.pool_options.max_pool_size
+        report = {
+            "ping_ms": ping_ms,
+            "connections": pool.total,
+            "in_use": pool.checked_out,
+            "utilisation": round(pool.checked_out / max_pool, 3) if max_pool else 0.0,
+            **pool.take_window(),
+        }
+        self.health = report
+        return report
+
+    def health_stats(self) -> dict:
+        return {k: v for k, v in self.health.items() if v is not None}
+
+    async def health_loop(self, interval: float):
+        while True:
+            try:
+                report = await self.health_check()
+            except Exception as e:
+                logger.exception(f"MongoDB health check crashed: {e!r}")
+                await asyncio.sleep(interval)
+                continue
+            message = (
+                f"Health: ping {report['ping_ms']}ms, {report['in_use']}/{report['connections']} connections in use "
+                f"({report['utilisation']:.0%} of pool), checkout wait avg {report['avg_wait_ms']:.1f}ms, "
+                f"max {report['max_wait_ms']:.1f}ms"
+            )
+            if report["ping_ms"] is None or report["utilisation"] > 0.8 or report["checkout_failures"]:
+                logger.warning(message)
+            else:
+                logger.debug(message)
+            await asyncio.sleep(interval)
+
+    async def close(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
\ No newline at end of file
@@ -0,0 +1,131 @@
+import asyncio
+import logging
+from typing import Callable
+
+import pyvolt
+
+logger = logging.getLogger("toko")
+
+PREVIOUS = "◀️"
+NEXT = "▶️"
+
+class PaginationSession:
+    __slots__ = ("message", "owner_id", "render", "page_count", "page", "timeout", "slot", "rounds")
+
+    def __init__(self, message, owner_id: str, render: Callable[[int], pyvolt.SendableEmbed],
+                 page_count: int, page: int, timeout: float):
+        self.message = message
+        self.owner_id = owner_id
+        self.render = render
+        self.page_count = page_count
+        self.page = page
+        self.timeout = timeout
+        # Position in the timer wheel
+        self.slot = -1
+        self.rounds = 0
+
+class TimerWheel:
+    """Hashed timer wheel: scheduling, cancelling and expiring are O(1) per session.
+
+    Each tick advances one of `size` slots; a session due in more than `size`
+    ticks waits out the extra full turns in `rounds`.
+    """
+
+    def __init__(self, tick: float = 1.0, size: int = 64):
+        self.tick = tick
+        self.size = size
+        self.slots: list[set[PaginationSession]] = [set() for _ in range(size)]
+        self.cursor = 0
+
+    def schedule(self, session: PaginationSession, delay: float):
+        self.cancel(session)
+        ticks = max(1, round(delay / self.tick))
+        session.slot = (self.cursor + ticks) % self.size
+        session.rounds = (ticks - 1) // self.size
+        self.slots[session.slot].add(session)
+
+    def cancel(self, session: PaginationSession):
+        if session.slot >= 0:
+            self.slots[session.slot].discard(session)
+            session.slot = -1
+
+    def advance(self) -> list[PaginationSession]:
+        """Move one tick forward and return the sessions that expired."""
+        self.cursor = (self.cursor + 1) % self.size
+        slot = self.slots[self.cursor]
+        expired = []
+        for session in list(slot):
+            if session.rounds:
+                session.rounds -= 1
+            else:
+                slot.discard(session)
+                session.slot = -1
+                expired.append(session)
+        return expired
+
+class PaginationManager:
+    """Reaction-driven paging for any gear's output.
+
+    Sessions are keyed by message id, so the single reaction listener
+    (modules/pagination.py) finds the right one in O(1). Sessions expire
+    `timeout` seconds after their last page turn.
+    """
+
+    def __init__(self, tick: float = 1.0):
+        self.sessions: dict[str, PaginationSession] = {}
+        self.wheel = TimerWheel(tick=tick)
+        self._ticker: asyncio.Task | None = None
+
+    async def send(self, ctx, render: Callable[[int], pyvolt.SendableEmbed], page_count: int,
+                   page: int = 0, timeout: float = 30.0):
+        """Reply with page `page` and let the author flip through `page_count` pages.
+
+        `render(i)` returns the embed of page i; it is called on every page turn,
+        so pass pre-rendered pages' `__getitem__` or render from live data.
+        """
+        message = await ctx.message.reply(embeds=[render(page)], silent=True)
+        if page_count <= 1:
+            return message
+
+        await message.react(PREVIOUS)
+        await message.react(NEXT)
+
+        session = PaginationSession(message, ctx.author.id, render, page_count, page, timeout)
+        self.sessions[message.id] = session
+        self.wheel.schedule(session, timeout)
+        if self._ticker is None or self._ticker.done():
+            self._ticker = asyncio.get_running_loop().create_task(self._tick_loop())
+        return message
+
+    async def handle_reaction(self, message_id: str, user_id: str, emoji: str):
+        session = self.sessions.get(message_id)
+        if session is None or user_id != session.owner_id or emoji not in (PREVIOUS, NEXT):
+            return
+
+        step = 1 if emoji == NEXT else -1
+        page = session.page + step
+        if 0 <= page < session.page_count:
+            session.page = page
+            self.wheel.schedule(session, session.timeout)
+            await session.message.edit(embeds=[session.render(page)])
+
+        try:
+            await session.message.remove_reaction(emoji, user_id)
+        except Exception:
+            pass
+
+    def stop(self, message_id: str):
+        session = self.sessions.pop(message_id, None)
+        if session is not None:
+            self.wheel.cancel(session)
+
+    async def _tick_loop(self):
+        while self.sessions:
+            await asyncio.sleep(self.wheel.tick)
+            for session in self.wheel.advance():
+                self.sessions.pop(session.message.id, None)
+
+    async def close(self):
+        if self._ticker is not None:
+            self._ticker.cancel()
+        self.sessions.clear()
@@ -0,0 +1,42 @@
+import time
+from collections import OrderedDict
+from typing import Hashable
+
+class TokenBucketLimiter:
+    """Per-key token buckets: `capacity` burst, refilled at `rate` tokens per second.
+
+    Each key costs one (tokens, timestamp) pair. At most `max_keys` are kept;
+    the least recently seen key is evicted first, which at worst forgives a
+    key that has gone quiet.
+    """
+
+    def __init__(self, rate: float, capacity: float, max_keys: int = 100_000):
+        self.rate = rate
+        self.capacity = capacity
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[Hashable, tuple[float, float]] = OrderedDict()
+        self.limited = 0
+
+    def acquire(self, key: Hashable, cost: float = 1.0) -> float:
+        """Take `cost` tokens from `key`'s bucket.
+
+        Returns 0.0 on success, or the seconds until enough tokens are available.
+        """
+        now = time.monotonic()
+        tokens, last = self._buckets.get(key, (self.capacity, now))
+        tokens = min(self.capacity, tokens + (now - last) * self.rate)
+
+        if tokens < cost:
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            self.limited += 1
+            return (cost - tokens) / self.rate
+
+        self._buckets[key] = (tokens - cost, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return 0.0
+
+    def stats(self) -> dict:
+        return {"keys": len(self._buckets), "limited": self.limited}
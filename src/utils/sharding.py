@@ -0,0 +1,58 @@
+import asyncio
+import time
+import zlib
+
+def shard_for(server_id: str, shard_count: int) -> int:
+    """Deterministic shard of a server (stable across processes, unlike hash())."""
+    return zlib.crc32(server_id.encode()) % shard_count
+
+def event_server_id(event) -> str | None:
+    """Best-effort server id an event belongs to, or None for global/DM events."""
+    server_id = getattr(event, "server_id", None)
+    if server_id:
+        return server_id
+
+    for attr in ("server", "message", "channel", "new_channel", "channel_id"):
+        obj = getattr(event, attr, None)
+        if obj is None:
+            continue
+        if attr == "server":
+            return getattr(obj, "id", None)
+        server_id = getattr(obj, "server_id", None)
+        if server_id:
+            return server_id
+        server = getattr(obj, "server", None)
+        if server is not None:
+            return getattr(server, "id", None)
+    return None
+
+class ShardStats:
+    """Event and command counters for one shard, reported to the launcher."""
+    __slots__ = ("shard_id", "events", "skipped", "commands", "_since")
+
+    def __init__(self, shard_id: int):
+        self.shard_id = shard_id
+        self.events = 0
+        self.skipped = 0
+        self.commands = 0
+        self._since = time.monotonic()
+
+    def snapshot(self) -> dict:
+        """Return the counters since the last snapshot and reset them."""
+        now = time.monotonic()
+        report = {
+            "shard": self.shard_id,
+            "events": self.events,
+            "skipped": self.skipped,
+            "commands": self.commands,
+            "seconds": now - self._since,
+        }
+        self.events = self.skipped = self.commands = 0
+        self._since = now
+        return report
+
+    async def report_to(self, queue, interval: float):
+        """Post a snapshot to a multiprocessing queue every `interval` seconds."""
+        while True:
+            await asyncio.sleep(interval)
+            queue.put_nowait(self.snapshot())
@@ -0,0 +1,77 @@
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger("toko")
+
+class StartupProfiler:
+    """Records how long each cold-start phase takes and reports them once.
+
+    `start()` is called first thing in main(); phases are timed with `phase()`
+    and `finish()` is called on the first READY. It logs the breakdown (and
+    writes it as JSON to STARTUP_PROFILE_PATH, if set) so cold-start
+    regressions show up between deploys.
+
+    A phase opened inside another is recorded as "parent/child" and listed
+    under its parent, so only top-level phases add up to the total. Phases
+    recorded before start() (the module imports) are reported separately.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: dict[str, float] = {}
+        self.finished = False
+        self._open: list[str] = []
+        self._before_start: set[str] = set()
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._before_start = set(self.phases)
+
+    def record(self, name: str, seconds: float):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name: str):
+        path = "/".join(self._open + [name])
+        self._open.append(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._open.pop()
+            self.record(path, time.perf_counter() - start)
+
+    def finish(self, name: str = "first_ready"):
+        """Record the time since process start as `name` and report. Only the first call counts."""
+        if self.finished:
+            return
+        self.finished = True
+        self.phases[name] = time.perf_counter() - self.started
+        self.report()
+
+    def report(self):
+        total = self.phases.get("first_ready", time.perf_counter() - self.started)
+        parts = []
+        for name, seconds in self.phases.items():
+            if "/" in name or name == "first_ready" or name in self._before_start:
+                continue
+            children = ", ".join(
+                f"{child.removeprefix(name + '/')} {child_seconds * 1000:.0f}ms"
+                for child, child_seconds in self.phases.items() if child.startswith(name + "/")
+            )
+            parts.append(f"{name} {seconds * 1000:.0f}ms" + (f" [{children}]" if children else ""))
+        before = ", ".join(f"{name} {self.phases[name] * 1000:.0f}ms" for name in self._before_start)
+        logger.info(
+            f"Cold start: first READY {total * 1000:.0f}ms after main() ({', '.join(parts)})"
+            + (f"; before main(): {before}" if before else "")
+        )
+
+        path = os.getenv("STARTUP_PROFILE_PATH")
+        if path:
+            with open(path, "w") as f:
+                json.dump({name: round(seconds * 1000, 2) for name, seconds in self.phases.items()}, f, indent=2)
+
+startup = StartupProfiler()